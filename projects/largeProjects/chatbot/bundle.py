@@ -0,0 +1,94 @@
+import json
+import struct
+import numpy as np
+
+from numpy_model import NumpyModel
+
+# Single-file chatbot bundle: everything chatbot.py needs in one read.
+#
+#   MAGIC | uint64 header length | JSON header | padding | float32 weights
+#
+# The JSON header holds the format version, vocabulary, classes, response
+# tables and, per Dense layer, the shapes, activation and offsets of its
+# kernel and bias inside the weight block. The weight block starts on a
+# 64-byte boundary, so it can be used in place from the read buffer or a mmap.
+
+BUNDLE_MAGIC = b'CHATBNDL'
+BUNDLE_VERSION = 1
+ALIGNMENT = 64
+
+# An intent tagged 'fallback' in intents.json overrides the default below-threshold replies
+FALLBACK_TAG = 'fallback'
+DEFAULT_FALLBACK_RESPONSES = ["Sorry, I didn't understand that.", "Could you rephrase that?"]
+
+def build_response_table(intents_json):
+    table = {intent['tag']: tuple(intent['responses']) for intent in intents_json['intents']}
+    fallback = table.pop(FALLBACK_TAG, None) or tuple(DEFAULT_FALLBACK_RESPONSES)
+    return table, fallback
+
+def check_shapes(layers, words, classes):
+    if layers[0][0].shape[0] != len(words) or layers[-1][0].shape[1] != len(classes):
+        raise ValueError(
+            f"Model expects {layers[0][0].shape[0]} words and {layers[-1][0].shape[1]} classes, "
+            f"but the vocabulary has {len(words)} words and {len(classes)} classes")
+
+def write_bundle(path, words, classes, responses, fallback_responses, layers):
+    # layers: list of (kernel, bias, activation), as used by NumpyModel
+    check_shapes(layers, words, classes)
+    arrays = []
+    layer_meta = []
+    offset = 0
+    for kernel, bias, activation in layers:
+        meta = {'activation': activation}
+        for name, array in (('kernel', kernel), ('bias', bias)):
+            array = np.ascontiguousarray(array, dtype='<f4')
+            meta[name] = {'shape': list(array.shape), 'offset': offset}
+            offset += array.nbytes
+            arrays.append(array)
+        layer_meta.append(meta)
+
+    header = json.dumps({
+        'version': BUNDLE_VERSION,
+        'words': list(words),
+        'classes': list(classes),
+        'responses': {tag: list(options) for tag, options in responses.items()},
+        'fallback': list(fallback_responses),
+        'layers': layer_meta,
+    }).encode('utf-8')
+    prefix = len(BUNDLE_MAGIC) + 8 + len(header)
+    with open(path, 'wb') as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        f.write(b'\0' * (-prefix % ALIGNMENT))
+        for array in arrays:
+            f.write(array.tobytes())
+
+def load_bundle(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+        raise ValueError(f"{path} is not a chatbot bundle")
+    (header_len,) = struct.unpack_from('<Q', data, len(BUNDLE_MAGIC))
+    start = len(BUNDLE_MAGIC) + 8
+    header = json.loads(data[start:start + header_len])
+    if header['version'] != BUNDLE_VERSION:
+        raise ValueError(f"{path} is bundle version {header['version']}, expected {BUNDLE_VERSION}")
+    base = start + header_len
+    base += -base % ALIGNMENT
+
+    # Weights are read-only views into the file contents, no copies
+    def view(meta):
+        count = int(np.prod(meta['shape']))
+        array = np.frombuffer(data, dtype='<f4', count=count, offset=base + meta['offset'])
+        return array.reshape(meta['shape'])
+
+    layers = [(view(meta['kernel']), view(meta['bias']), meta['activation']) for meta in header['layers']]
+    check_shapes(layers, header['words'], header['classes'])
+    return {
+        'words': header['words'],
+        'classes': header['classes'],
+        'responses': {tag: tuple(options) for tag, options in header['responses'].items()},
+        'fallback': tuple(header['fallback']),
+        'model': NumpyModel(layers),
+    }
@@ -1,61 +1,157 @@
+import os
+import sys
+import argparse
 import random
 import json
 import pickle
+from functools import lru_cache
 import numpy as np
-import ssl
-import certifi
-import nltk
 
-from nltk.stem import WordNetLemmatizer
+from bundle import build_response_table, load_bundle
+from numpy_model import NumpyModel
+from preprocessing import SENTENCE_CACHE_SIZE, clean_up_sentence, describe_cache, timed
+import preprocessing
 
-from tensorflow.keras.models import load_model
+BUNDLE_FILE = 'chatbot_bundle.bin'
+use_keras = os.environ.get('CHATBOT_BACKEND') == 'keras'
 
-lemmatizer = WordNetLemmatizer()
-intents = json.loads(open('intents.json').read())
+if not use_keras and os.path.exists(BUNDLE_FILE):
+    # One file written by training.py: vocabulary, classes, responses and weights that always match
+    with timed('load bundle'):
+        bundle = load_bundle(BUNDLE_FILE)
+    intents = None
+    words = bundle['words']
+    classes = bundle['classes']
+    responses, fallback_responses = bundle['responses'], bundle['fallback']
+    model = bundle['model']
+else:
+    with timed('load intents'):
+        intents = json.loads(open('intents.json').read())
+    responses, fallback_responses = build_response_table(intents)
 
-words = pickle.load(open('words.pkl', 'rb'))
-classes = pickle.load(open('classes.pkl', 'rb'))
-model = load_model('chatbot_model.keras')  # Ensure this matches the saved model's extension
+    with timed('load vocabulary'):
+        words = pickle.load(open('words.pkl', 'rb'))
+        classes = pickle.load(open('classes.pkl', 'rb'))
 
-def clean_up_sentence(sentence):
-    sentence_words = nltk.word_tokenize(sentence)
-    sentence_words = [lemmatizer.lemmatize(word) for word in sentence_words]
-    return sentence_words
+    # Prefer the NumPy export written by training.py; set CHATBOT_BACKEND=keras to force TensorFlow
+    with timed('load model'):
+        if not use_keras and os.path.exists('chatbot_model.npz'):
+            model = NumpyModel.load('chatbot_model.npz')
+        else:
+            from tensorflow.keras.models import load_model
+            model = load_model('chatbot_model.keras')  # Ensure this matches the saved model's extension
 
-def bag_of_words(sentence):
+word_index = {word: i for i, word in enumerate(words)}
+
+def start_up(warmup='eager', allow_download=False):
+    # warmup: 'eager' loads NLTK data now, 'background' in a thread, 'lazy' on the first message
+    preprocessing.ensure_resources(offline=not allow_download)
+    if warmup == 'eager':
+        preprocessing.warm_up()
+    elif warmup == 'background':
+        preprocessing.warm_up_in_background()
+    return dict(preprocessing.startup_timings)
+
+@lru_cache(maxsize=SENTENCE_CACHE_SIZE)
+def sentence_indices(sentence):
+    # Whole-message feature cache on top of the token caches in preprocessing
     sentence_words = clean_up_sentence(sentence)
-    bag = [0] * len(words)
-    for w in sentence_words:
-        for i, word in enumerate(words):
-            if word == w: 
-                bag[i] = 1
-    return np.array(bag)
+    return tuple(sorted({word_index[w] for w in sentence_words if w in word_index}))
 
-def predict_class(sentence):
-    bow = bag_of_words(sentence)
-    res = model.predict(np.array([bow]))[0]
-    ERROR_THRESHOLD = 0.25
-    results = [[i, r] for i, r in enumerate(res) if r > ERROR_THRESHOLD]
-    
+def cache_stats():
+    stats = preprocessing.cache_stats()
+    stats['features'] = describe_cache(sentence_indices)
+    return stats
+
+def bag_of_words(sentence, sparse=False):
+    # sparse=True returns just the sorted vocabulary indices that are set
+    indices = list(sentence_indices(sentence))
+    if sparse:
+        return np.array(indices, dtype=np.intp)
+    bag = np.zeros(len(words), dtype=np.float32)
+    bag[indices] = 1
+    return bag
+
+ERROR_THRESHOLD = 0.25
+
+def bag_matrix(sentences):
+    # One row per sentence, filled from the sparse bag indices
+    bags = np.zeros((len(sentences), len(words)), dtype=np.float32)
+    for row, sentence in enumerate(sentences):
+        bags[row, bag_of_words(sentence, sparse=True)] = 1
+    return bags
+
+def rank_intents(probabilities):
+    results = [[i, r] for i, r in enumerate(probabilities) if r > ERROR_THRESHOLD]
     results.sort(key=lambda x: x[1], reverse=True)
-    return_list = []
-    for r in results:
-        return_list.append({'intent': classes[r[0]], 'probability': str(r[1])})
-    return return_list
-
-def get_response(intents_list, intents_json):
-    tag = intents_list[0]['intent']
-    list_of_intents = intents_json['intents']
-    for i in list_of_intents:
-        if i['tag'] == tag:
-            result = random.choice(i['responses'])
-            break
-    return result
-
-print("Start Chatting!")
-
-while True: 
-    message = input("")
-    ints = predict_class(message)
-    res = get_response(ints, intents)
-    print(res)
\ No newline at end of file
+    return [{'intent': classes[r[0]], 'probability': str(r[1])} for r in results]
+
+def predict_classes(sentences):
+    # Featurize every sentence into one matrix and run a single forward pass
+    if not sentences:
+        return []
+    res = model.predict(bag_matrix(sentences), verbose=0)
+    return [rank_intents(row) for row in res]
+
+def predict_class(sentence):
+    return predict_classes([sentence])[0]
+
+def classify_stream(lines, batch_size=256):
+    # Yields (message, ranked intents) for every non-empty line, batch_size at a time
+    batch = []
+    for line in lines:
+        message = line.strip()
+        if not message:
+            continue
+        batch.append(message)
+        if len(batch) == batch_size:
+            yield from zip(batch, predict_classes(batch))
+            batch = []
+    if batch:
+        yield from zip(batch, predict_classes(batch))
+
+def get_response(intents_list, intents_json=None):
+    # intents_json is only kept for older callers; lookups go through the prebuilt tables
+    if not intents_list:
+        return random.choice(fallback_responses)
+    return random.choice(responses.get(intents_list[0]['intent'], fallback_responses))
+
+def chat():
+    print("Start Chatting!")
+
+    while True: 
+        message = input("")
+        ints = predict_class(message)
+        res = get_response(ints)
+        print(res)
+
+def classify_file(path, batch_size):
+    # Writes one JSON object per message: {"message": ..., "intents": [...]}
+    source = sys.stdin if path == '-' else open(path)
+    try:
+        for message, ints in classify_stream(source, batch_size):
+            print(json.dumps({'message': message, 'intents': ints}))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--classify', metavar='FILE',
+                        help="classify one message per line of FILE ('-' for stdin) instead of chatting")
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--warmup', choices=['eager', 'background', 'lazy'], default='eager')
+    parser.add_argument('--allow-download', action='store_true',
+                        help="download missing NLTK data instead of failing")
+    parser.add_argument('--timings', action='store_true', help="print startup phase timings")
+    args = parser.parse_args()
+
+    timings = start_up(args.warmup, args.allow_download)
+    if args.timings:
+        for phase, seconds in timings.items():
+            print(f"{phase}: {seconds * 1000:.1f} ms", file=sys.stderr)
+
+    if args.classify:
+        classify_file(args.classify, args.batch_size)
+    else:
+        chat()
\ No newline at end of file
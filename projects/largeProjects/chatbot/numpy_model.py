@@ -0,0 +1,71 @@
+import sys
+import numpy as np
+
+# Plain NumPy forward pass for the Dense/ReLU/softmax chatbot model, so the
+# chat process doesn't need TensorFlow. Dropout layers only matter in training
+# and are skipped on export.
+
+ACTIVATIONS = {
+    'linear': lambda z: z,
+    'relu': lambda z: np.maximum(z, 0, out=z),
+}
+
+def softmax(z):
+    z -= z.max(axis=1, keepdims=True)
+    np.exp(z, out=z)
+    z /= z.sum(axis=1, keepdims=True)
+    return z
+
+ACTIVATIONS['softmax'] = softmax
+
+class NumpyModel:
+    def __init__(self, layers):
+        # layers: list of (kernel, bias, activation name)
+        for _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {activation}")
+        self.layers = layers
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as archive:
+            activations = [str(a) for a in archive['activations']]
+            layers = [(archive[f'kernel_{i}'], archive[f'bias_{i}'], activation)
+                      for i, activation in enumerate(activations)]
+        return cls(layers)
+
+    def predict(self, x, verbose=0):
+        # Same call shape as keras Model.predict: (n_samples, n_words) -> (n_samples, n_classes)
+        a = np.asarray(x, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            a = a @ kernel
+            a += bias
+            a = ACTIVATIONS[activation](a)
+        return a
+
+def keras_dense_layers(model):
+    layers = []
+    for layer in model.layers:
+        if type(layer).__name__ != 'Dense':
+            continue
+        kernel, bias = layer.get_weights()
+        layers.append((kernel.astype(np.float32), bias.astype(np.float32), layer.get_config()['activation']))
+    return layers
+
+def export_keras_model(model, path):
+    arrays = {}
+    activations = []
+    for i, (kernel, bias, activation) in enumerate(keras_dense_layers(model)):
+        arrays[f'kernel_{i}'] = kernel
+        arrays[f'bias_{i}'] = bias
+        activations.append(activation)
+    np.savez(path, activations=np.array(activations), **arrays)
+
+if __name__ == '__main__':
+    # Convert an existing Keras model: python numpy_model.py [model.keras] [out.npz]
+    from tensorflow.keras.models import load_model
+
+    source = sys.argv[1] if len(sys.argv) > 1 else 'chatbot_model.keras'
+    target = sys.argv[2] if len(sys.argv) > 2 else 'chatbot_model.npz'
+    export_keras_model(load_model(source), target)
+    print(f"Exported {source} to {target}")
@@ -0,0 +1,115 @@
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import certifi
+import nltk
+from nltk.stem import WordNetLemmatizer
+
+# Shared tokenization/lemmatization for chatbot.py and training.py. Both steps
+# go through bounded LRU caches, so repeated tokens and repeated messages
+# ("hi", "bye") skip NLTK entirely after the first time.
+
+LEMMA_CACHE_SIZE = 65536
+SENTENCE_CACHE_SIZE = 4096
+
+# NLTK data each script needs, as nltk.download id -> nltk.data path
+REQUIRED_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',  # what word_tokenize loads on nltk >= 3.8.2
+    'wordnet': 'corpora/wordnet',
+}
+
+# Seconds spent in each named startup phase, filled by timed()
+startup_timings = {}
+
+lemmatizer = WordNetLemmatizer()
+
+# Set by warm_up_in_background. NLTK's lazy corpus loading is not thread-safe,
+# so lemmatize/tokenize wait for this thread before their first NLTK call
+warm_up_thread = None
+
+@contextmanager
+def timed(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[phase] = startup_timings.get(phase, 0.0) + time.perf_counter() - start
+
+def missing_resources():
+    missing = []
+    for name, path in REQUIRED_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(name)
+    return missing
+
+def ensure_resources(offline=True):
+    # Only touches the network when something is missing and offline is False
+    with timed('check nltk data'):
+        missing = missing_resources()
+        if not missing:
+            return
+        if offline:
+            raise LookupError(
+                f"Missing NLTK data {missing}. Run once with downloads allowed, or "
+                f"python -m nltk.downloader {' '.join(missing)}")
+        # Verify certificates against certifi's bundle instead of turning verification off
+        ssl._create_default_https_context = lambda: ssl.create_default_context(cafile=certifi.where())
+        for name in missing:
+            nltk.download(name, quiet=True)
+        still_missing = missing_resources()
+        if still_missing:
+            raise LookupError(f"Could not download NLTK data {still_missing}")
+
+def warm_up():
+    # WordNet and the punkt model load on first use; pay that cost now instead of on the first message
+    with timed('warm up nltk'):
+        lemmatizer.lemmatize('warming')
+        nltk.word_tokenize('Warming up the tokenizer.')
+
+def warm_up_in_background():
+    global warm_up_thread
+    warm_up_thread = threading.Thread(target=warm_up, name='nltk-warm-up', daemon=True)
+    warm_up_thread.start()
+    return warm_up_thread
+
+def wait_for_warm_up():
+    thread = warm_up_thread
+    if thread is not None and thread is not threading.current_thread():
+        thread.join()
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(token):
+    wait_for_warm_up()
+    return lemmatizer.lemmatize(token)
+
+@lru_cache(maxsize=SENTENCE_CACHE_SIZE)
+def tokenize(sentence):
+    wait_for_warm_up()
+    return tuple(nltk.word_tokenize(sentence))
+
+def clean_up_sentence(sentence):
+    return [lemmatize(word) for word in tokenize(sentence)]
+
+def describe_cache(cached_function):
+    info = cached_function.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'hit_rate': info.hits / lookups if lookups else 0.0,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+    }
+
+def cache_stats():
+    return {'lemma': describe_cache(lemmatize), 'tokenize': describe_cache(tokenize)}
+
+def clear_caches():
+    lemmatize.cache_clear()
+    tokenize.cache_clear()
@@ -0,0 +1,176 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Importing chatbot loads words.pkl, classes.pkl, intents.json and the model once
+import chatbot
+
+# HTTP front end for the chatbot. Each request thread hands its message to a
+# single MicroBatcher thread, which groups whatever arrived within a few
+# milliseconds into one predict_classes call.
+#
+#   POST /chat  {"message": "hi"}  ->  {"response": "...", "intents": [...]}
+#   GET  /stats                    ->  latency/throughput counters
+
+class Stats:
+    def __init__(self, window=10000):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.requests = 0
+        self.batches = 0
+        self.batched_messages = 0
+        self.latencies = deque(maxlen=window)
+
+    def record_batch(self, size):
+        with self.lock:
+            self.batches += 1
+            self.batched_messages += size
+
+    def record_request(self, seconds):
+        with self.lock:
+            self.requests += 1
+            self.latencies.append(seconds)
+
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            uptime = time.monotonic() - self.started
+            requests, batches, batched = self.requests, self.batches, self.batched_messages
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        return {
+            'requests': requests,
+            'uptime_seconds': uptime,
+            'requests_per_second': requests / uptime if uptime else 0.0,
+            'batches': batches,
+            'mean_batch_size': batched / batches if batches else 0.0,
+            'latency_ms_p50': percentile(50),
+            'latency_ms_p90': percentile(90),
+            'latency_ms_p99': percentile(99),
+            'caches': chatbot.cache_stats(),
+        }
+
+class MicroBatcher:
+    def __init__(self, stats, max_batch=64, max_delay=0.005):
+        self.stats = stats
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, message):
+        future = Future()
+        self.pending.put((message, future))
+        return future
+
+    def run(self):
+        while True:
+            # Block for the first message, then gather more until the batch is full or the delay runs out
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            messages = [message for message, _ in batch]
+            try:
+                results = chatbot.predict_classes(messages)
+            except Exception:
+                # Retry one at a time so a single bad message only fails its own request
+                for message, future in batch:
+                    try:
+                        ints = chatbot.predict_classes([message])[0]
+                    except Exception as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(ints)
+                continue
+            self.stats.record_batch(len(batch))
+            for (_, future), ints in zip(batch, results):
+                future.set_result(ints)
+
+class ChatHandler(BaseHTTPRequestHandler):
+    batcher = None
+    stats = None
+    timeout_seconds = 10
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.send_json(200, self.stats.snapshot())
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/chat':
+            self.send_json(404, {'error': 'not found'})
+            return
+        start = time.monotonic()
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            message = json.loads(self.rfile.read(length) or b'{}').get('message', '')
+            if not isinstance(message, str):
+                raise ValueError(message)
+        except (ValueError, AttributeError):
+            self.send_json(400, {'error': 'expected a JSON body like {"message": "..."}'})
+            return
+        try:
+            ints = self.batcher.submit(message).result(timeout=self.timeout_seconds)
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+            return
+        self.send_json(200, {'response': chatbot.get_response(ints), 'intents': ints})
+        self.stats.record_request(time.monotonic() - start)
+
+    def log_message(self, format, *args):
+        pass  # per-request logging would dominate the latency we are measuring
+
+class ChatServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # socketserver's default backlog of 5 resets bursts of connections
+
+def serve(host='127.0.0.1', port=8000, max_batch=64, max_delay_ms=5.0):
+    timings = chatbot.start_up('eager')
+    print("Startup: " + ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in timings.items()))
+    stats = Stats()
+    ChatHandler.stats = stats
+    ChatHandler.batcher = MicroBatcher(stats, max_batch=max_batch, max_delay=max_delay_ms / 1000)
+    server = ChatServer((host, port), ChatHandler)
+    print(f"Chatbot serving on http://{host}:{port} (POST /chat, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-delay-ms', type=float, default=5.0)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_batch, args.max_delay_ms)
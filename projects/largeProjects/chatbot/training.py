@@ -1,75 +1,157 @@
-import random
+import os
+import argparse
 import json
 import pickle
 import numpy as np
-import ssl
-import certifi
-import nltk
 
-ssl._create_default_https_context = ssl._create_unverified_context
-nltk.download('punkt')
-nltk.download('wordnet')
-
-from nltk.stem import WordNetLemmatizer
-from tensorflow.keras.models import Sequential
+from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import Dense, Activation, Dropout  
 from tensorflow.keras.optimizers import SGD
 
-lemmatizer = WordNetLemmatizer()
+from bundle import build_response_table, write_bundle
+from numpy_model import export_keras_model, keras_dense_layers
+from preprocessing import cache_stats, ensure_resources, lemmatize, tokenize
 
-intents = json.loads(open('intents.json').read())
+# Remembers what the last build was trained on, plus its tokenization, so
+# --incremental can diff intents.json and skip NLTK for unchanged patterns
+BUILD_STATE_FILE = 'build_state.pkl'
 
-words = []
-classes = []
-documents = []
 ignore_letters = ['?', '!', '.', ',']
 
-for intent in intents['intents']:
-    for pattern in intent['patterns']:
-        word_list = nltk.word_tokenize(pattern)
-        words.extend(word_list)
-        documents.append((word_list, intent['tag']))
-        if intent['tag'] not in classes:
-            classes.append(intent['tag'])
-
-words = [lemmatizer.lemmatize(word) for word in words if word not in ignore_letters]
-words = sorted(set(words))
-
-classes = sorted(set(classes))
-
-pickle.dump(words, open('words.pkl', 'wb'))
-pickle.dump(classes, open('classes.pkl', 'wb'))
-
-training = []
-output_empty = [0] * len(classes)
-
-for document in documents:
-    bag = []
-    word_patterns = document[0]
-    word_patterns = [lemmatizer.lemmatize(word.lower()) for word in word_patterns]
-    for word in words:
-        bag.append(1) if word in word_patterns else bag.append(0)
-        
-    output_row = list(output_empty)
-    output_row[classes.index(document[1])] = 1
-    training.append([bag, output_row])
-
-random.shuffle(training)
-training = np.array(training, dtype=object)
-
-train_x = np.array(list(training[:, 0]))
-train_y = np.array(list(training[:, 1]))
-
-model = Sequential()
-model.add(Dense(128, input_shape=(len(train_x[0]),), activation='relu'))
-model.add(Dropout(0.5))
-model.add(Dense(64, activation='relu'))
-model.add(Dropout(0.5))
-model.add(Dense(len(train_y[0]), activation='softmax'))
-
-sgd = SGD(learning_rate=0.01, decay=1e-6, momentum=0.9, nesterov=True)
-model.compile(loss='categorical_crossentropy', optimizer=sgd, metrics=['accuracy'])
-
-model.fit(np.array(train_x), np.array(train_y), epochs=200, batch_size=5, verbose=1)
-model.save('chatbot_model.keras')  # Save with the recommended .keras extension
-print("done")
+def load_build_state():
+    if not os.path.exists(BUILD_STATE_FILE):
+        return {'documents': set(), 'tokens': {}, 'lemmas': {}}
+    return pickle.load(open(BUILD_STATE_FILE, 'rb'))
+
+def cached_tokens(pattern, state):
+    tokens = state['tokens'].get(pattern)
+    if tokens is None:
+        tokens = state['tokens'][pattern] = list(tokenize(pattern))
+    return tokens
+
+def cached_lemma(token, state):
+    lemma = state['lemmas'].get(token)
+    if lemma is None:
+        lemma = state['lemmas'][token] = lemmatize(token)
+    return lemma
+
+def load_documents(intents, state):
+    documents = []
+    for intent in intents['intents']:
+        for pattern in intent['patterns']:
+            documents.append((cached_tokens(pattern, state), intent['tag'], pattern))
+    return documents
+
+def vocabulary_of(documents, state):
+    return {cached_lemma(word, state) for word_list, _, _ in documents
+            for word in word_list if word not in ignore_letters}
+
+def build_matrices(documents, words, classes, state):
+    word_index = {word: i for i, word in enumerate(words)}
+    class_index = {tag: i for i, tag in enumerate(classes)}
+
+    # Fill preallocated matrices straight from index lookups; model.fit shuffles every epoch
+    train_x = np.zeros((len(documents), len(words)), dtype=np.uint8)
+    train_y = np.zeros((len(documents), len(classes)), dtype=np.float32)
+    rows = []
+    cols = []
+    for row, (word_patterns, tag, _) in enumerate(documents):
+        for word in word_patterns:
+            col = word_index.get(cached_lemma(word.lower(), state))
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+        train_y[row, class_index[tag]] = 1
+    train_x[rows, cols] = 1
+    return train_x, train_y
+
+def build_model(n_words, n_classes):
+    model = Sequential()
+    model.add(Dense(128, input_shape=(n_words,), activation='relu'))
+    model.add(Dropout(0.5))
+    model.add(Dense(64, activation='relu'))
+    model.add(Dropout(0.5))
+    model.add(Dense(n_classes, activation='softmax'))
+
+    sgd = SGD(learning_rate=0.01, decay=1e-6, momentum=0.9, nesterov=True)
+    model.compile(loss='categorical_crossentropy', optimizer=sgd, metrics=['accuracy'])
+    return model
+
+def warm_start(model, previous):
+    # Copy the previous weights in. New vocabulary rows of the first layer and
+    # new class columns of the last layer keep their fresh initialisation.
+    new_layers = [layer for layer in model.layers if isinstance(layer, Dense)]
+    old_layers = [layer for layer in previous.layers if isinstance(layer, Dense)]
+    for layer, old_layer in zip(new_layers, old_layers):
+        kernel, bias = layer.get_weights()
+        old_kernel, old_bias = old_layer.get_weights()
+        kernel[:old_kernel.shape[0], :old_kernel.shape[1]] = old_kernel
+        bias[:old_bias.shape[0]] = old_bias
+        layer.set_weights([kernel, bias])
+
+def train(incremental=False, epochs=None, offline=False):
+    ensure_resources(offline=offline)
+    intents = json.loads(open('intents.json').read())
+    can_reuse = incremental and os.path.exists(BUILD_STATE_FILE) and os.path.exists('chatbot_model.keras')
+    if incremental and not can_reuse:
+        print("No previous build found, training from scratch")
+    state = load_build_state() if can_reuse else {'documents': set(), 'tokens': {}, 'lemmas': {}}
+
+    documents = load_documents(intents, state)
+    current = {(tag, pattern) for _, tag, pattern in documents}
+    if can_reuse and current == state['documents']:
+        # Responses are not part of the diff, so refresh the bundle's table from the existing weights
+        write_bundle('chatbot_bundle.bin', pickle.load(open('words.pkl', 'rb')),
+                     pickle.load(open('classes.pkl', 'rb')), *build_response_table(intents),
+                     keras_dense_layers(load_model('chatbot_model.keras')))
+        print("Patterns unchanged since the last build, nothing to retrain; responses updated")
+        return
+
+    vocabulary = vocabulary_of(documents, state)
+    tags = {tag for _, tag, _ in documents}
+    if can_reuse:
+        # Keep existing indices stable so the old weights still line up
+        words = pickle.load(open('words.pkl', 'rb'))
+        classes = pickle.load(open('classes.pkl', 'rb'))
+        added_words = sorted(vocabulary - set(words))
+        added_classes = sorted(tags - set(classes))
+        words = words + added_words
+        classes = classes + added_classes
+        print(f"Incremental build: {len(current - state['documents'])} new/changed patterns, "
+              f"{len(added_words)} new words, {len(added_classes)} new classes")
+    else:
+        words = sorted(vocabulary)
+        classes = sorted(tags)
+
+    pickle.dump(words, open('words.pkl', 'wb'))
+    pickle.dump(classes, open('classes.pkl', 'wb'))
+
+    train_x, train_y = build_matrices(documents, words, classes, state)
+    print("Preprocessing cache:", cache_stats())
+
+    model = build_model(len(words), len(classes))
+    if can_reuse:
+        warm_start(model, load_model('chatbot_model.keras'))
+    if epochs is None:
+        epochs = 30 if can_reuse else 200
+
+    model.fit(train_x, train_y, epochs=epochs, batch_size=5, shuffle=True, verbose=1)
+    model.save('chatbot_model.keras')  # Save with the recommended .keras extension
+    export_keras_model(model, 'chatbot_model.npz')  # TensorFlow-free copy for chatbot.py
+    write_bundle('chatbot_bundle.bin', words, classes, *build_response_table(intents),
+                 keras_dense_layers(model))
+
+    state['documents'] = current
+    pickle.dump(state, open(BUILD_STATE_FILE, 'wb'))
+    print("done")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--incremental', action='store_true',
+                        help="reuse the last build's vocabulary, tokenization and weights")
+    parser.add_argument('--epochs', type=int,
+                        help="training epochs (default 200, or 30 when warm-starting)")
+    parser.add_argument('--offline', action='store_true',
+                        help="use locally cached NLTK data only, never download")
+    args = parser.parse_args()
+    train(incremental=args.incremental, epochs=args.epochs, offline=args.offline)
@@ -1,6 +1,10 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
-from gemini import configure_gemini, get_gemini_response
+from gemini import (FakeBackend, configure_gemini, get_gemini_response, set_backend,
+                    stream_gemini_response)
+from response_cache import ResponseCache
+from sessions import create_session_store
+import json
 import os
 from dotenv import load_dotenv
 
@@ -16,12 +20,20 @@ CORS(app, resources={
     }
 })
 
-# Configure Gemini with API key
-api_key = os.getenv('GEMINI_API_KEY')
-configure_gemini(api_key)
+# Create the model backend once at startup; LLM_BACKEND=fake uses a local stand-in
+if os.getenv('LLM_BACKEND') == 'fake':
+    set_backend(FakeBackend(latency=float(os.getenv('FAKE_LLM_LATENCY', '0'))))
+else:
+    # Configure Gemini with API key
+    api_key = os.getenv('GEMINI_API_KEY')
+    configure_gemini(api_key)
 
-# Store conversations in memory (you might want to use a database in production)
-conversations = {}
+# Conversation histories: bounded in-memory store, or SQLite when SESSION_DB is set
+sessions = create_session_store()
+
+# Shared answers for repeated prompts; RESPONSE_CACHE_SIZE=0 turns caching off
+response_cache = ResponseCache(max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '1000')),
+                               ttl=float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '600')))
 
 @app.route('/', methods=['GET'])
 def health_check():
@@ -35,27 +47,22 @@ def handle_data():
             message = data.get('message', '')
             session_id = request.headers.get('X-Session-ID', 'default')
             
-            # Initialize conversation history if it doesn't exist
-            if session_id not in conversations:
-                conversations[session_id] = []
-            
-            # Add user message to history
-            conversations[session_id].append({
-                'role': 'user',
-                'content': message
-            })
-            
-            # Get response from Gemini
-            response = get_gemini_response(message, conversations[session_id])
-            
-            # Add assistant response to history
-            conversations[session_id].append({
-                'role': 'assistant',
-                'content': response
-            })
-            
-            # Limit conversation history to last 10 messages
-            conversations[session_id] = conversations[session_id][-10:]
+            # Requests for the same session wait for each other; the store trims the history on exit
+            with sessions.turn(session_id) as history:
+                # Add user message to history
+                history.append({
+                    'role': 'user',
+                    'content': message
+                })
+                
+                # Get response from Gemini
+                response = get_gemini_response(message, history, cache=response_cache)
+                
+                # Add assistant response to history
+                history.append({
+                    'role': 'assistant',
+                    'content': response
+                })
             
             return jsonify({
                 'status': 'success',
@@ -70,6 +77,48 @@ def handle_data():
     
     return jsonify({"message": "Send a POST request with your message"})
 
+def sse_event(payload, event=None):
+    lines = f"event: {event}\n" if event else ""
+    return lines + f"data: {json.dumps(payload)}\n\n"
+
+@app.route('/api/stream', methods=['POST'])
+def handle_stream():
+    # Same conversation handling as /api, but the answer is relayed as Server-Sent
+    # Events: one {"delta": ...} event per chunk, then a "done" event with the full text
+    data = request.json or {}
+    message = data.get('message', '')
+    session_id = request.headers.get('X-Session-ID', 'default')
+
+    def generate():
+        # The session stays locked until the stream finishes or the client disconnects
+        with sessions.turn(session_id) as history:
+            history.append({
+                'role': 'user',
+                'content': message
+            })
+            parts = []
+            try:
+                for delta in stream_gemini_response(message, history, cache=response_cache):
+                    parts.append(delta)
+                    yield sse_event({'delta': delta})
+            except Exception as e:
+                yield sse_event({'message': str(e)}, event='error')
+                return
+
+            response = ''.join(parts)
+            history.append({
+                'role': 'assistant',
+                'content': response
+            })
+        yield sse_event({'message': response}, event='done')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    return jsonify({'response_cache': response_cache.stats()})
+
 @app.route('/api/todos', methods=['GET', 'POST'])
 def todo():
     if request.method == 'POST':
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app, response_cache, sessions, sse_event
+from gemini import aget_gemini_response, astream_gemini_response
+
+# Async serving mode: run with `uvicorn asgi:app --port 5001` (or `python asgi.py`).
+# The chat endpoints are handled here as coroutines, so a request waiting on the
+# model holds no thread and one process can keep hundreds of chats in flight.
+# Every other route (health check, todos, CORS preflight) is passed to the Flask
+# app, which runs on asgiref's thread pool.
+
+# Upstream model calls allowed at once; the rest wait for a free slot
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '256'))
+# Seconds a request may spend waiting for a slot plus the model call
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT_SECONDS', '30'))
+
+ALLOWED_ORIGINS = {'http://localhost:3000'}
+
+llm_limiter = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+flask_asgi = WsgiToAsgi(flask_app)
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionError("Client disconnected")
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+def response_headers(scope, content_type, extra=()):
+    headers = [(b'content-type', content_type)]
+    origin = dict(scope['headers']).get(b'origin', b'').decode('latin-1')
+    if origin in ALLOWED_ORIGINS:
+        headers += [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'Origin')]
+    return headers + list(extra)
+
+async def send_json(scope, send, payload, status=200):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': response_headers(scope, b'application/json')})
+    await send({'type': 'http.response.body', 'body': json.dumps(payload).encode('utf-8')})
+
+async def until_disconnect(receive, coro):
+    # Runs coro, cancelling it if the client goes away first (the request body is already read)
+    task = asyncio.ensure_future(coro)
+
+    async def watch():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        task.cancel()
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        return await task
+    finally:
+        watcher.cancel()
+
+def request_fields(scope, body):
+    data = json.loads(body)
+    session_id = dict(scope['headers']).get(b'x-session-id', b'default').decode('latin-1')
+    return data.get('message', ''), session_id
+
+async def handle_chat(scope, receive, send):
+    # Async counterpart of the POST branch of /api in app.py
+    async def turn():
+        async with sessions.aturn(session_id) as history:
+            history.append({'role': 'user', 'content': message})
+            response = await aget_gemini_response(message, history, cache=response_cache,
+                                                  limiter=llm_limiter, timeout=LLM_TIMEOUT)
+            history.append({'role': 'assistant', 'content': response})
+        return response
+
+    try:
+        message, session_id = request_fields(scope, await read_body(receive))
+        response = await until_disconnect(receive, turn())
+    except (ConnectionError, asyncio.CancelledError):
+        return
+    except Exception as e:
+        await send_json(scope, send, {'status': 'error', 'message': str(e)}, status=500)
+        return
+    await send_json(scope, send, {'status': 'success', 'message': response})
+
+async def handle_stream(scope, receive, send):
+    # Async counterpart of /api/stream: the same delta / done / error events
+    try:
+        message, session_id = request_fields(scope, await read_body(receive) or b'{}')
+    except ConnectionError:
+        return
+    except Exception as e:
+        await send_json(scope, send, {'status': 'error', 'message': str(e)}, status=400)
+        return
+
+    async def relay():
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': response_headers(scope, b'text/event-stream',
+                                                [(b'cache-control', b'no-cache'),
+                                                 (b'x-accel-buffering', b'no')])})
+
+        async def event(payload, name=None):
+            await send({'type': 'http.response.body', 'more_body': True,
+                        'body': sse_event(payload, name).encode('utf-8')})
+
+        # The session stays locked until the stream finishes or the client disconnects
+        async with sessions.aturn(session_id) as history:
+            history.append({'role': 'user', 'content': message})
+            parts = []
+            try:
+                async for delta in astream_gemini_response(message, history, cache=response_cache,
+                                                           limiter=llm_limiter, timeout=LLM_TIMEOUT):
+                    parts.append(delta)
+                    await event({'delta': delta})
+            except Exception as e:
+                await event({'message': str(e)}, 'error')
+                return
+
+            response = ''.join(parts)
+            history.append({'role': 'assistant', 'content': response})
+        await event({'message': response}, 'done')
+
+    try:
+        await until_disconnect(receive, relay())
+    except asyncio.CancelledError:
+        return
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def handle_metrics(scope, receive, send):
+    await send_json(scope, send, {
+        'response_cache': response_cache.stats(),
+        'llm': {'max_concurrency': LLM_MAX_CONCURRENCY, 'timeout_seconds': LLM_TIMEOUT},
+    })
+
+ROUTES = {
+    ('POST', '/api'): handle_chat,
+    ('POST', '/api/stream'): handle_stream,
+    ('GET', '/api/metrics'): handle_metrics,
+}
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    handler = ROUTES.get((scope.get('method'), scope.get('path')))
+    if handler is None:
+        await flask_asgi(scope, receive, send)
+    else:
+        await handler(scope, receive, send)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=5001)
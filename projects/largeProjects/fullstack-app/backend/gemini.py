@@ -1,53 +1,319 @@
-import google.generativeai as genai
+import asyncio
+import threading
+import time
+
+from response_cache import cache_key
+
+# Model backends. The app creates one backend at startup and every request
+# thread shares it; set_backend swaps in another (e.g. FakeBackend for tests
+# and latency benchmarks).
+
+class LLMBackend:
+    def generate(self, prompt):
+        raise NotImplementedError
+
+    def stream(self, prompt):
+        # Backends without native streaming send the whole answer as one chunk
+        yield self.generate(prompt)
+
+    # Async variants used by the ASGI server (asgi.py). The defaults run the
+    # blocking call on a worker thread; native async backends override them
+    async def agenerate(self, prompt):
+        return await asyncio.to_thread(self.generate, prompt)
+
+    async def astream(self, prompt):
+        yield await self.agenerate(prompt)
+
+class GeminiBackend(LLMBackend):
+    def __init__(self, api_key, model_name='gemini-2.0-flash'):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        # One long-lived model: its client keeps the connection open and is
+        # safe to call from several threads at once
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt):
+        return self.model.generate_content(prompt).text
+
+    def stream(self, prompt):
+        for chunk in self.model.generate_content(prompt, stream=True):
+            yield chunk.text
+
+    async def agenerate(self, prompt):
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def astream(self, prompt):
+        async for chunk in await self.model.generate_content_async(prompt, stream=True):
+            yield chunk.text
+
+class FakeBackend(LLMBackend):
+    # Local stand-in that answers after a fixed delay, without any network calls
+    def __init__(self, latency=0.0, reply="This is a fake response."):
+        self.latency = latency
+        self.reply = reply
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return f"Assistant: {self.reply}"
+
+    def stream(self, prompt):
+        # Same total latency as generate, spread over one chunk per word
+        with self._lock:
+            self.calls += 1
+        pieces = f"Assistant: {self.reply}".split(' ')
+        for i, piece in enumerate(pieces):
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield piece if i == 0 else ' ' + piece
+
+    async def agenerate(self, prompt):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return f"Assistant: {self.reply}"
+
+    async def astream(self, prompt):
+        with self._lock:
+            self.calls += 1
+        pieces = f"Assistant: {self.reply}".split(' ')
+        for i, piece in enumerate(pieces):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(pieces))
+            yield piece if i == 0 else ' ' + piece
+
+_backend = None
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+def get_backend():
+    if _backend is None:
+        raise RuntimeError("No model backend configured; call configure_gemini or set_backend first")
+    return _backend
 
 # Configure the Gemini API
 def configure_gemini(api_key):
-    genai.configure(api_key=api_key)
+    set_backend(GeminiBackend(api_key))
+
+def build_prompt(prompt, history=None):
+    # Prepare conversation history
+    if not history:
+        return prompt
+
+    formatted_history = "\n".join([
+        f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
+        for msg in history[:-1]
+    ])
+    
+    # Enhanced prompt with more specific formatting instructions
+    return (
+        "You are a helpful AI assistant. Follow these formatting rules:\n"
+        "1. Respond directly without prefixing responses with 'Assistant:', 'Agent:', etc.\n"
+        "2. For mathematical expressions:\n"
+        "   - Write equations using plain text (e.g., 'x^2' instead of '$x^2$')\n"
+        "   - Use ^ for exponents, * for multiplication\n"
+        "   - Don't use LaTeX/MathJax delimiters (no $ or $$)\n"
+        "   - For functions, write f(x) instead of $f(x)$\n"
+        "3. Format mathematical solutions clearly with line breaks and indentation\n"
+        "4. If unsure about a request, ask for clarification\n"
+        "5. If there is an error or does not comply with the rules, respond with 'I'm sorry, I cannot do that.'\n"
+        "6. No rude language, so language that is okay to be used for a child\n\n"
+        f"{formatted_history}\n\nUser: {prompt}"
+    )
+
+PREFIXES_TO_REMOVE = ["Assistant:", "Agent:", "A:", "AI:"]
+
+def remove_prefixes(response_text):
+    response_text = response_text.lstrip()
+    for prefix in PREFIXES_TO_REMOVE:
+        if response_text.startswith(prefix):
+            response_text = response_text[len(prefix):].lstrip()
+    return response_text
+
+def clean_response(response_text):
+    return remove_prefixes(response_text).rstrip()
+
+# Characters held back at the start of a stream so prefixes split across chunks are still caught
+STREAM_HEAD_CHARS = 64
+
+class StreamCleaner:
+    # Incremental clean_response: the joined output equals clean_response of the joined input.
+    # feed() and finish() return the cleaned pieces that are ready to send
+    def __init__(self):
+        self.head = ''
+        self.head_done = False
+        self.pending = ''  # trailing whitespace, only sent once more text follows it
+        self.started = False
+
+    def feed(self, chunk):
+        if self.head_done:
+            return self._emit(chunk)
+        self.head += chunk
+        if len(self.head) < STREAM_HEAD_CHARS:
+            return []
+        self.head_done = True
+        return self._emit(remove_prefixes(self.head))
+
+    def finish(self):
+        if self.head_done:
+            return []
+        self.head_done = True
+        return self._emit(remove_prefixes(self.head))
+
+    def _emit(self, piece):
+        if not self.started:
+            piece = piece.lstrip()
+            self.started = bool(piece)
+        piece = self.pending + piece
+        body = piece.rstrip()
+        self.pending = piece[len(body):]
+        return [body] if body else []
+
+def clean_stream(chunks):
+    cleaner = StreamCleaner()
+    for chunk in chunks:
+        yield from cleaner.feed(chunk)
+    yield from cleaner.finish()
+
+async def aclean_stream(chunks):
+    cleaner = StreamCleaner()
+    async for chunk in chunks:
+        for piece in cleaner.feed(chunk):
+            yield piece
+    for piece in cleaner.finish():
+        yield piece
 
 # Function to get response from Gemini
-def get_gemini_response(prompt, history=None):
+def get_gemini_response(prompt, history=None, backend=None, cache=None):
+    # cache: optional ResponseCache; identical concurrent requests share one upstream call
     try:
-        # Configure the model
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        # Prepare conversation history
-        if history:
-            formatted_history = "\n".join([
-                f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
-                for msg in history[:-1]
-            ])
-            
-            # Enhanced prompt with more specific formatting instructions
-            full_prompt = (
-                "You are a helpful AI assistant. Follow these formatting rules:\n"
-                "1. Respond directly without prefixing responses with 'Assistant:', 'Agent:', etc.\n"
-                "2. For mathematical expressions:\n"
-                "   - Write equations using plain text (e.g., 'x^2' instead of '$x^2$')\n"
-                "   - Use ^ for exponents, * for multiplication\n"
-                "   - Don't use LaTeX/MathJax delimiters (no $ or $$)\n"
-                "   - For functions, write f(x) instead of $f(x)$\n"
-                "3. Format mathematical solutions clearly with line breaks and indentation\n"
-                "4. If unsure about a request, ask for clarification\n"
-                "5. If there is an error or does not comply with the rules, respond with 'I'm sorry, I cannot do that.'\n"
-                "6. No rude language, so language that is okay to be used for a child\n\n"
-                f"{formatted_history}\n\nUser: {prompt}"
-            )
-        else:
-            full_prompt = prompt
-        
-        # Generate response
-        response = model.generate_content(full_prompt)
-        
-        # Clean up response
-        response_text = response.text.strip()
-        
-        # Remove prefixes
-        prefixes_to_remove = ["Assistant:", "Agent:", "A:", "AI:"]
-        for prefix in prefixes_to_remove:
-            if response_text.startswith(prefix):
-                response_text = response_text[len(prefix):].strip()
-        
-        return response_text
+        backend = backend or get_backend()
+        generate = lambda: clean_response(backend.generate(build_prompt(prompt, history)))
+        if cache is None:
+            return generate()
+        return cache.get_or_compute(cache_key(prompt, history), generate)
         
     except Exception as e:
         return f"Error generating response: {str(e)}"
+
+def stream_gemini_response(prompt, history=None, backend=None, cache=None):
+    # Cache hits, and identical requests arriving while this one is streaming, get
+    # the whole answer as a single chunk; completed streams are added to the cache.
+    # Unlike get_gemini_response, errors are raised so the caller can report them
+    # separately from the text already sent
+    backend = backend or get_backend()
+    if cache is None:
+        yield from clean_stream(backend.stream(build_prompt(prompt, history)))
+        return
+
+    key = cache_key(prompt, history)
+    response, flight = cache.claim(key)
+    if flight is None:
+        yield response
+        return
+
+    parts = []
+    try:
+        for part in clean_stream(backend.stream(build_prompt(prompt, history))):
+            parts.append(part)
+            yield part
+    except Exception as e:
+        cache.finish(key, flight, error=e)
+        raise
+    except BaseException:
+        # The client went away; anyone waiting on this stream asks again
+        cache.finish(key, flight)
+        raise
+    cache.finish(key, flight, result=''.join(parts))
+
+# Async versions for the ASGI server. limiter is an optional asyncio.Semaphore
+# capping concurrent upstream calls; timeout (seconds) covers waiting for a
+# slot plus the model call, and for streams the whole stream.
+
+async def _limited(limiter, call):
+    if limiter is None:
+        return await call()
+    async with limiter:
+        return await call()
+
+async def aget_gemini_response(prompt, history=None, backend=None, cache=None, limiter=None, timeout=None):
+    try:
+        backend = backend or get_backend()
+
+        async def generate():
+            call = lambda: backend.agenerate(build_prompt(prompt, history))
+            return clean_response(await asyncio.wait_for(_limited(limiter, call), timeout))
+
+        if cache is None:
+            return await generate()
+        return await cache.aget_or_compute(cache_key(prompt, history), generate)
+
+    except asyncio.TimeoutError:
+        return f"Error generating response: model did not answer within {timeout} seconds"
+    except Exception as e:
+        return f"Error generating response: {str(e)}"
+
+async def _astream_upstream(backend, prompt, history, limiter, timeout):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    remaining = lambda: None if deadline is None else max(deadline - loop.time(), 0)
+
+    try:
+        if limiter is not None:
+            await asyncio.wait_for(limiter.acquire(), remaining())
+        try:
+            chunks = aclean_stream(backend.astream(build_prompt(prompt, history)))
+            try:
+                while True:
+                    try:
+                        part = await asyncio.wait_for(chunks.__anext__(), remaining())
+                    except StopAsyncIteration:
+                        break
+                    yield part
+            finally:
+                await chunks.aclose()
+        finally:
+            if limiter is not None:
+                limiter.release()
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Model did not answer within {timeout} seconds") from None
+
+async def astream_gemini_response(prompt, history=None, backend=None, cache=None, limiter=None, timeout=None):
+    # Like stream_gemini_response, errors (including timeouts) are raised to the caller
+    backend = backend or get_backend()
+    if cache is None:
+        async for part in _astream_upstream(backend, prompt, history, limiter, timeout):
+            yield part
+        return
+
+    key = cache_key(prompt, history)
+    response, flight = await cache.aclaim(key)
+    if flight is None:
+        yield response
+        return
+
+    parts = []
+    chunks = _astream_upstream(backend, prompt, history, limiter, timeout)
+    try:
+        async for part in chunks:
+            parts.append(part)
+            yield part
+    except Exception as e:
+        cache.afinish(key, flight, error=e)
+        raise
+    except BaseException:
+        # Cancelled or closed early; anyone waiting on this stream asks again
+        cache.afinish(key, flight)
+        raise
+    finally:
+        await chunks.aclose()
+    cache.afinish(key, flight, result=''.join(parts))
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+# Load test for the chat endpoints. Start a server against the local fake model,
+# e.g. the async one:
+#
+#     LLM_BACKEND=fake FAKE_LLM_LATENCY=1 RESPONSE_CACHE_SIZE=0 uvicorn asgi:app --port 5001
+#
+# then run `python load_test.py --requests 2000 --concurrency 500`. Each request
+# gets its own session and message, so nothing is served from the response cache.
+
+async def post(host, port, path, payload, session_id):
+    body = json.dumps(payload).encode('utf-8')
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"X-Session-ID: {session_id}\r\n"
+            "Connection: close\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    status = int(response.split(b' ', 2)[1])
+    return status, response.partition(b'\r\n\r\n')[2]
+
+def succeeded(path, status, body):
+    if status != 200:
+        return False
+    if path.endswith('/stream'):
+        return b'event: done' in body and b'event: error' not in body
+    return b'"success"' in body and b'Error generating response' not in body
+
+async def run(args):
+    latencies = []
+    failures = 0
+    next_request = iter(range(args.requests))
+
+    async def client():
+        nonlocal failures
+        for i in next_request:
+            start = time.perf_counter()
+            try:
+                status, body = await asyncio.wait_for(
+                    post(args.host, args.port, args.path, {'message': f"load test message {i}"},
+                         f"load-{i}"),
+                    args.timeout)
+                ok = succeeded(args.path, status, body)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests to {args.path}, {args.concurrency} concurrent: "
+          f"{len(latencies)} ok, {failures} failed in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.1f} req/s)")
+    if latencies:
+        latencies.sort()
+        pick = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000
+        print(f"latency ms: mean {statistics.mean(latencies) * 1000:.1f}  p50 {pick(0.50):.1f}  "
+              f"p95 {pick(0.95):.1f}  p99 {pick(0.99):.1f}  max {latencies[-1] * 1000:.1f}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the chat backend")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--path', default='/api', help="/api or /api/stream")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--timeout', type=float, default=60.0, help="per-request timeout in seconds")
+    args = parser.parse_args()
+    failures = asyncio.run(run(args))
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
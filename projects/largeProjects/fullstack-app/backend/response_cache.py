@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Cache of model answers keyed on the normalised prompt plus a digest of the
+# conversation before it. Concurrent misses for the same key are coalesced:
+# the first caller runs the upstream request and the rest wait for its result.
+# Failures are passed to every waiter but never cached. aget_or_compute is the
+# asyncio version used by asgi.py; the upstream call runs as its own task, so
+# it keeps going for the other waiters when the caller that started it is
+# cancelled, and is only cancelled once nobody is waiting for it.
+#
+# Streamed answers use claim/finish (aclaim/afinish when async): the caller
+# that gets a flight streams the answer and finishes it with the full text;
+# concurrent callers for the same key wait and get that text in one piece.
+# A stream finished without a result or error (its client went away) is
+# abandoned, and its waiters retry as if they had just arrived.
+
+def normalize_prompt(prompt):
+    return ' '.join(prompt.lower().split())
+
+def cache_key(prompt, history=None):
+    # history includes the current user message last, as passed to get_gemini_response
+    earlier = [(msg['role'], msg['content']) for msg in (history or [])[:-1]]
+    digest = hashlib.sha256(json.dumps(earlier).encode('utf-8')).hexdigest()
+    return f"{digest}:{normalize_prompt(prompt)}"
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+
+class _AsyncInFlight:
+    def __init__(self, future, cancel_when_unused):
+        self.future = future  # resolves to the response, or _ABANDONED
+        self.cancel_when_unused = cancel_when_unused
+        self.waiters = 0
+
+_ABANDONED = object()
+
+class ResponseCache:
+    def __init__(self, max_entries=1000, ttl=600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (response, stored at), least recently used first
+        self._in_flight = {}
+        self._async_in_flight = {}  # key -> _AsyncInFlight, only touched from the event loop
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[1] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, key):
+        with self._lock:
+            response = self._lookup(key, time.monotonic())
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+
+    def put(self, key, response):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (response, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def claim(self, key):
+        # Returns (response, None) on a hit or once a concurrent request for key
+        # finished, or (None, flight) when the caller must produce the answer
+        # and then call finish(key, flight, ...)
+        while True:
+            with self._lock:
+                response = self._lookup(key, time.monotonic())
+                if response is not None:
+                    self.hits += 1
+                    return response, None
+                flight = self._in_flight.get(key)
+                if flight is None:
+                    self.misses += 1
+                    flight = self._in_flight[key] = _InFlight()
+                    return None, flight
+                self.coalesced += 1
+
+            flight.done.wait()
+            if flight.abandoned:
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, None
+
+    def finish(self, key, flight, result=None, error=None):
+        # Neither result nor error: the flight is abandoned and its waiters retry
+        if error is None and result is not None:
+            self.put(key, result)
+        flight.result = result
+        flight.error = error
+        flight.abandoned = error is None and result is None
+        with self._lock:
+            del self._in_flight[key]
+        flight.done.set()
+
+    def get_or_compute(self, key, compute):
+        response, flight = self.claim(key)
+        if flight is None:
+            return response
+        try:
+            response = compute()
+        except Exception as e:
+            self.finish(key, flight, error=e)
+            raise
+        except BaseException:
+            self.finish(key, flight)
+            raise
+        self.finish(key, flight, result=response)
+        return response
+
+    async def _await_flight(self, key, flight):
+        # Waits for a flight this caller has joined; the last waiter to leave
+        # cancels an upstream task nobody needs any more
+        try:
+            # shield: cancelling this caller must not cancel the shared task
+            return await asyncio.shield(flight.future)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and flight.cancel_when_unused and not flight.future.done():
+                flight.future.cancel()
+
+    async def aget_or_compute(self, key, compute):
+        # compute is an async function
+        while True:
+            with self._lock:
+                response = self._lookup(key, time.monotonic())
+                if response is not None:
+                    self.hits += 1
+                    return response
+                flight = self._async_in_flight.get(key)
+                if flight is None:
+                    self.misses += 1
+                    task = asyncio.ensure_future(compute())
+                    flight = self._async_in_flight[key] = _AsyncInFlight(task, cancel_when_unused=True)
+                    task.add_done_callback(lambda task, flight=flight: self._async_done(key, flight))
+                else:
+                    self.coalesced += 1
+                flight.waiters += 1
+
+            response = await self._await_flight(key, flight)
+            if response is not _ABANDONED:
+                return response
+
+    def _async_done(self, key, flight):
+        with self._lock:
+            if self._async_in_flight.get(key) is flight:
+                del self._async_in_flight[key]
+        if not flight.future.cancelled() and flight.future.exception() is None:
+            self.put(key, flight.future.result())
+
+    async def aclaim(self, key):
+        # asyncio version of claim; the caller that gets a flight calls afinish
+        while True:
+            with self._lock:
+                response = self._lookup(key, time.monotonic())
+                if response is not None:
+                    self.hits += 1
+                    return response, None
+                flight = self._async_in_flight.get(key)
+                if flight is None:
+                    self.misses += 1
+                    future = asyncio.get_running_loop().create_future()
+                    flight = self._async_in_flight[key] = _AsyncInFlight(future, cancel_when_unused=False)
+                    return None, flight
+                self.coalesced += 1
+                flight.waiters += 1
+
+            response = await self._await_flight(key, flight)
+            if response is not _ABANDONED:
+                return response, None
+
+    def afinish(self, key, flight, result=None, error=None):
+        with self._lock:
+            del self._async_in_flight[key]
+        if error is not None:
+            flight.future.set_exception(error)
+            flight.future.exception()  # mark as retrieved when nobody was waiting
+        elif result is not None:
+            self.put(key, result)
+            flight.future.set_result(result)
+        else:
+            flight.future.set_result(_ABANDONED)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'in_flight': len(self._in_flight) + len(self._async_in_flight),
+            }
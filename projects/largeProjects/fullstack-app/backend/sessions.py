@@ -0,0 +1,228 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+# Conversation history stores. Both keep at most max_sessions sessions, drop
+# sessions idle for longer than ttl seconds and keep the last max_messages
+# messages of each. Use them through turn(), which serialises concurrent
+# requests for the same session:
+#
+#     with sessions.turn(session_id) as history:
+#         history.append({'role': 'user', 'content': message})
+#         ...
+#
+# The (trimmed) history is saved when the block exits, even on errors.
+# The per-session locks only cover one process. Across worker processes the
+# SQLite store saves with a compare-and-swap on a version number; a turn that
+# lost the race re-reads the history and appends its own messages after it.
+# Async handlers (asgi.py) use `async with sessions.aturn(session_id)` instead:
+# it waits on asyncio locks, so a turn awaiting the model never blocks the
+# event loop, and runs load/save on a worker thread.
+
+class SessionStore:
+    def __init__(self, max_sessions=10000, ttl=3600, max_messages=10):
+        # history[-0:] is the whole list, so 0 would quietly mean "keep everything"
+        if max_messages < 1:
+            raise ValueError(f"max_messages must be at least 1, got {max_messages}")
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self._locks = {}  # session id -> [lock, number of holders and waiters]
+        self._locks_guard = threading.Lock()
+        self._async_locks = {}  # same as _locks, for aturn; only touched from the event loop
+
+    def load(self, session_id):
+        raise NotImplementedError
+
+    def save(self, session_id, history):
+        raise NotImplementedError
+
+    def trim(self, history):
+        return history[-self.max_messages:]
+
+    def load_versioned(self, session_id):
+        # Returns (history, version) for save_turn; stores without versions return None
+        return self.load(session_id), None
+
+    def save_turn(self, session_id, history, start, version):
+        # history[start:] are the messages appended during the turn
+        self.save(session_id, self.trim(history))
+
+    @contextmanager
+    def _session_lock(self, session_id):
+        with self._locks_guard:
+            entry = self._locks.setdefault(session_id, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[session_id]
+
+    @contextmanager
+    def turn(self, session_id):
+        with self._session_lock(session_id):
+            history, version = self.load_versioned(session_id)
+            start = len(history)
+            try:
+                yield history
+            finally:
+                self.save_turn(session_id, history, start, version)
+
+    @asynccontextmanager
+    async def aturn(self, session_id):
+        entry = self._async_locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                history, version = await asyncio.to_thread(self.load_versioned, session_id)
+                start = len(history)
+                try:
+                    yield history
+                finally:
+                    await asyncio.to_thread(self.save_turn, session_id, history, start, version)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._async_locks[session_id]
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, max_sessions=10000, ttl=3600, max_messages=10):
+        super().__init__(max_sessions, ttl, max_messages)
+        # Least recently used first, so expired and evictable sessions sit at the front
+        self._sessions = OrderedDict()  # session id -> (history, last used)
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl:
+                break
+            del self._sessions[session_id]
+
+    def load(self, session_id):
+        with self._lock:
+            self._expire(time.monotonic())
+            history, _ = self._sessions.get(session_id, ([], None))
+            return list(history)
+
+    def save(self, session_id, history):
+        with self._lock:
+            now = time.monotonic()
+            self._sessions[session_id] = (list(history), now)
+            self._sessions.move_to_end(session_id)
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+class SQLiteSessionStore(SessionStore):
+    # Histories survive restarts and are shared by every worker process using
+    # the same file. Each row carries a version that save_turn compares and
+    # bumps, so concurrent turns in different processes never overwrite each
+    # other. Cleanup of expired/excess sessions runs every cleanup_every saves
+    # rather than on each one.
+    def __init__(self, path, max_sessions=10000, ttl=3600, max_messages=10, cleanup_every=100,
+                 save_attempts=10):
+        super().__init__(max_sessions, ttl, max_messages)
+        self.path = path
+        self.cleanup_every = cleanup_every
+        self.save_attempts = save_attempts
+        self._saves = 0
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                       "id TEXT PRIMARY KEY, history TEXT NOT NULL, updated REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+            # Files created before versioning lack the column
+            columns = [row[1] for row in db.execute("PRAGMA table_info(sessions)")]
+            if 'version' not in columns:
+                db.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _connection(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30)
+        return db
+
+    def load(self, session_id):
+        row = self._connection().execute(
+            "SELECT history FROM sessions WHERE id = ? AND updated >= ?",
+            (session_id, time.time() - self.ttl)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def load_versioned(self, session_id):
+        row = self._connection().execute(
+            "SELECT history, updated, version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return [], None
+        history, updated, version = row
+        # An expired row is still the one to compare against, but starts empty
+        return (json.loads(history) if updated >= time.time() - self.ttl else []), version
+
+    def save(self, session_id, history):
+        with self._connection() as db:
+            db.execute("INSERT INTO sessions (id, history, updated, version) VALUES (?, ?, ?, 1) "
+                       "ON CONFLICT (id) DO UPDATE SET history = excluded.history, "
+                       "updated = excluded.updated, version = version + 1",
+                       (session_id, json.dumps(history), time.time()))
+        self._saved()
+
+    def save_turn(self, session_id, history, start, version):
+        added = history[start:]
+        for _ in range(self.save_attempts):
+            values = (json.dumps(self.trim(history)), time.time(), session_id)
+            with self._connection() as db:
+                if version is None:
+                    cursor = db.execute("INSERT OR IGNORE INTO sessions (history, updated, id, version) "
+                                        "VALUES (?, ?, ?, 1)", values)
+                else:
+                    cursor = db.execute("UPDATE sessions SET history = ?, updated = ?, version = version + 1 "
+                                        "WHERE id = ? AND version = ?", values + (version,))
+            if cursor.rowcount == 1:
+                self._saved()
+                return
+            # Another process saved this session since it was loaded: keep its
+            # messages and put this turn's after them
+            history, version = self.load_versioned(session_id)
+            history = history + added
+        raise RuntimeError(f"Could not save session {session_id!r}: too many concurrent updates")
+
+    def _saved(self):
+        self._saves += 1
+        if self._saves % self.cleanup_every == 0:
+            self.cleanup()
+
+    def cleanup(self):
+        with self._connection() as db:
+            db.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - self.ttl,))
+            db.execute("DELETE FROM sessions WHERE id NOT IN "
+                       "(SELECT id FROM sessions ORDER BY updated DESC LIMIT ?)", (self.max_sessions,))
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+def create_session_store():
+    # SESSION_DB=path/to/file.db selects the SQLite store; limits come from the environment too
+    options = {
+        'max_sessions': int(os.getenv('SESSION_MAX_SESSIONS', '10000')),
+        'ttl': float(os.getenv('SESSION_TTL_SECONDS', '3600')),
+        'max_messages': int(os.getenv('SESSION_MAX_MESSAGES', '10')),
+    }
+    if os.getenv('SESSION_DB'):
+        return SQLiteSessionStore(os.getenv('SESSION_DB'), **options)
+    return MemorySessionStore(**options)
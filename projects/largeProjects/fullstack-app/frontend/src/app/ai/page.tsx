@@ -17,6 +17,17 @@ interface Position {
   y: number;
 }
 
+// One conversation per browser tab: the backend keeps history and serialises
+// requests per session id, so a shared id would queue every user behind each other
+function getSessionId(): string {
+  let id = sessionStorage.getItem('sessionId');
+  if (!id) {
+    id = crypto.randomUUID();
+    sessionStorage.setItem('sessionId', id);
+  }
+  return id;
+}
+
 export default function Home() {
   const [message, setMessage] = useState('');
   const [messages, setMessages] = useState<Message[]>([]);
@@ -98,7 +109,7 @@ export default function Home() {
         headers: {
           'Content-Type': 'application/json',
           'Accept': 'application/json',
-          'X-Session-ID': 'default'
+          'X-Session-ID': getSessionId()
         },
         body: JSON.stringify({ message }),
       });
@@ -2,8 +2,493 @@
 A simple implementation of a feedforward neural network with ReLU and softmax activation.
 """
 
-from typing import List, Tuple
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import numpy as np
+from numpy.typing import DTypeLike
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+Batch = Tuple[np.ndarray, np.ndarray]
+BatchSource = Union[Iterable[Batch], Callable[[], Iterable[Batch]]]
+
+# Checkpoint layout: magic, little-endian uint64 header length, JSON header,
+# zero padding up to CHECKPOINT_ALIGNMENT, then the flat parameter buffer.
+CHECKPOINT_MAGIC = b'NNCKPT01'
+CHECKPOINT_ALIGNMENT = 64
+
+
+class Optimizer:
+    """Base class for parameter update rules.
+    
+    State arrays are allocated once, on the first step, to match the
+    parameters; every later step updates parameters and state in place.
+    
+    Attributes:
+        learning_rate: Step size.
+        iterations: Number of steps taken so far.
+    """
+
+    def __init__(self, learning_rate: float = 0.01) -> None:
+        """Create the optimizer.
+        
+        Args:
+            learning_rate: Step size.
+        """
+        self.learning_rate = learning_rate
+        self.iterations = 0
+        self._scratch: List[np.ndarray] = []
+
+    def _zeros_like(self, params: List[np.ndarray]) -> List[np.ndarray]:
+        """Allocate one zero-filled state array per parameter."""
+        return [np.zeros(param.shape, dtype=param.dtype) for param in params]
+
+    def initialize(self, params: List[np.ndarray]) -> None:
+        """Allocate state arrays for params. Called automatically by step."""
+        self._scratch = [np.empty(param.shape, dtype=param.dtype) for param in params]
+
+    def step(self, params: List[np.ndarray], grads: List[np.ndarray]) -> None:
+        """Update params in place from grads.
+        
+        Args:
+            params: Parameter arrays, always passed in the same order.
+            grads: Gradients matching params. May be overwritten.
+        """
+        if len(self._scratch) != len(params):
+            self.initialize(params)
+        self.iterations += 1
+        for i, (param, grad) in enumerate(zip(params, grads)):
+            self._update(i, param, grad)
+
+    def _update(self, i: int, param: np.ndarray, grad: np.ndarray) -> None:
+        """Apply the update rule to parameter number i."""
+        raise NotImplementedError
+
+
+class SGD(Optimizer):
+    """Stochastic gradient descent with optional (Nesterov) momentum.
+    
+    Attributes:
+        momentum: Velocity decay factor. 0 gives plain SGD.
+        nesterov: Use Nesterov accelerated gradient.
+    """
+
+    def __init__(self, learning_rate: float = 0.01, momentum: float = 0.0,
+                 nesterov: bool = False) -> None:
+        """Create the optimizer.
+        
+        Args:
+            learning_rate: Step size.
+            momentum: Velocity decay factor, typically 0.9.
+            nesterov: Look ahead along the velocity before applying the gradient.
+        """
+        super().__init__(learning_rate)
+        if nesterov and momentum <= 0:
+            raise ValueError("Nesterov momentum requires momentum > 0")
+        self.momentum = momentum
+        self.nesterov = nesterov
+        self._velocity: List[np.ndarray] = []
+
+    def initialize(self, params: List[np.ndarray]) -> None:
+        super().initialize(params)
+        self._velocity = self._zeros_like(params) if self.momentum else []
+
+    def _update(self, i: int, param: np.ndarray, grad: np.ndarray) -> None:
+        grad *= self.learning_rate
+        if not self.momentum:
+            param -= grad
+            return
+        velocity = self._velocity[i]
+        velocity *= self.momentum
+        velocity -= grad
+        if self.nesterov:
+            scratch = self._scratch[i]
+            np.multiply(velocity, self.momentum, out=scratch)
+            scratch -= grad
+            param += scratch
+        else:
+            param += velocity
+
+
+class Adam(Optimizer):
+    """Adam: per-parameter step sizes from running gradient moments.
+    
+    Attributes:
+        beta1: Decay rate of the first moment estimate.
+        beta2: Decay rate of the second moment estimate.
+        epsilon: Small constant guarding the division.
+    """
+
+    def __init__(self, learning_rate: float = 0.001, beta1: float = 0.9,
+                 beta2: float = 0.999, epsilon: float = 1e-8) -> None:
+        """Create the optimizer.
+        
+        Args:
+            learning_rate: Step size.
+            beta1: Decay rate of the first moment estimate.
+            beta2: Decay rate of the second moment estimate.
+            epsilon: Small constant guarding the division.
+        """
+        super().__init__(learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self._m: List[np.ndarray] = []
+        self._v: List[np.ndarray] = []
+
+    def initialize(self, params: List[np.ndarray]) -> None:
+        super().initialize(params)
+        self._m = self._zeros_like(params)
+        self._v = self._zeros_like(params)
+
+    def _update(self, i: int, param: np.ndarray, grad: np.ndarray) -> None:
+        m, v, scratch = self._m[i], self._v[i], self._scratch[i]
+        m *= self.beta1
+        np.multiply(grad, 1 - self.beta1, out=scratch)
+        m += scratch
+        v *= self.beta2
+        np.multiply(grad, grad, out=scratch)
+        scratch *= 1 - self.beta2
+        v += scratch
+        
+        # Bias correction folded into the step size and epsilon
+        correction1 = 1 - self.beta1 ** self.iterations
+        correction2 = (1 - self.beta2 ** self.iterations) ** 0.5
+        np.sqrt(v, out=scratch)
+        scratch += self.epsilon * correction2
+        np.divide(m, scratch, out=scratch)
+        scratch *= self.learning_rate * correction2 / correction1
+        param -= scratch
+
+
+def peak_memory_bytes() -> int:
+    """Peak resident set size of this process, or 0 where it is unavailable."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class TrainingCallback:
+    """Hooks called by the training loops. Override the ones you need.
+    
+    Epoch statistics are passed as a dict with the keys epoch, loss, samples,
+    seconds, samples_per_sec and peak_memory_bytes, plus per-phase timings:
+    forward_seconds, backward_seconds and update_seconds for NeuralNetwork,
+    gradient_seconds and update_seconds for ParallelTrainer. Epochs on which
+    validation ran also carry val_loss.
+    
+    Attributes:
+        stop_training: Set to True from on_epoch_end to end training early.
+    """
+
+    stop_training = False
+
+    def on_train_begin(self) -> None:
+        """Called once before the first epoch."""
+
+    def on_epoch_end(self, stats: Dict[str, float]) -> None:
+        """Called after every epoch with that epoch's statistics."""
+
+    def on_train_end(self) -> None:
+        """Called once after the last epoch, even if training raised."""
+
+
+class PrintProgress(TrainingCallback):
+    """Print the loss every few epochs. The default training callback."""
+
+    def __init__(self, every: int = 100) -> None:
+        """Create the callback.
+        
+        Args:
+            every: Print on epochs that are a multiple of this.
+        """
+        self.every = every
+
+    def on_epoch_end(self, stats: Dict[str, float]) -> None:
+        if stats['epoch'] % self.every == 0:
+            print(f"Epoch {stats['epoch']:4d}, Loss: {stats['loss']:.6f}")
+
+
+class JSONLinesLogger(TrainingCallback):
+    """Append each epoch's statistics to a file as one JSON object per line."""
+
+    def __init__(self, path: str) -> None:
+        """Create the callback.
+        
+        Args:
+            path: File to append to. Opened when training begins.
+        """
+        self.path = path
+        self._file = None
+
+    def on_train_begin(self) -> None:
+        self._file = open(self.path, 'a')
+
+    def on_epoch_end(self, stats: Dict[str, float]) -> None:
+        self._file.write(json.dumps(stats) + '\n')
+        self._file.flush()
+
+    def on_train_end(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def run_epochs(run_epoch: Callable[[int], Dict[str, float]], epochs: int,
+               callbacks: Optional[List[TrainingCallback]] = None) -> None:
+    """Drive a training loop and report every epoch to the callbacks.
+    
+    Args:
+        run_epoch: Trains one epoch given its index and returns its statistics
+                  (at least loss and samples).
+        epochs: Number of epochs to run.
+        callbacks: Hooks to notify. None prints progress every 100 epochs.
+    """
+    if callbacks is None:
+        callbacks = [PrintProgress()]
+    for callback in callbacks:
+        callback.on_train_begin()
+    try:
+        for epoch in range(epochs):
+            start = time.perf_counter()
+            stats = run_epoch(epoch)
+            seconds = time.perf_counter() - start
+            stats.update(
+                epoch=epoch,
+                seconds=seconds,
+                samples_per_sec=stats['samples'] / seconds if seconds > 0 else 0.0,
+                peak_memory_bytes=peak_memory_bytes(),
+            )
+            for callback in callbacks:
+                callback.on_epoch_end(stats)
+            if any(callback.stop_training for callback in callbacks):
+                break
+    finally:
+        for callback in callbacks:
+            callback.on_train_end()
+
+
+class EarlyStopping(TrainingCallback):
+    """Stop training once a monitored statistic stops improving.
+    
+    Epochs whose stats lack the monitored key (e.g. epochs between validation
+    runs) are ignored. The best parameters are kept in buffers allocated once,
+    and copied back into the network when training ends.
+    
+    Attributes:
+        best: Best value of the monitored statistic seen so far.
+        best_epoch: Epoch at which best was reached.
+        stopped_epoch: Epoch at which training was stopped, or None.
+    """
+
+    def __init__(self, network: 'NeuralNetwork', monitor: str = 'val_loss',
+                 patience: int = 10, min_delta: float = 0.0,
+                 restore_best_weights: bool = True) -> None:
+        """Create the callback.
+        
+        Args:
+            network: Network being trained.
+            monitor: Stats key to minimise.
+            patience: Number of monitored epochs without improvement to allow.
+            min_delta: Smallest decrease that counts as an improvement.
+            restore_best_weights: Restore the best parameters at the end.
+        """
+        self.network = network
+        self.monitor = monitor
+        self.patience = patience
+        self.min_delta = min_delta
+        self.restore_best_weights = restore_best_weights
+        self._best_params: List[np.ndarray] = []
+
+    def on_train_begin(self) -> None:
+        self.stop_training = False
+        self.best = float('inf')
+        self.best_epoch = -1
+        self.stopped_epoch = None
+        self._wait = 0
+        if self.restore_best_weights:
+            self._best_params = [np.empty_like(param)
+                                 for param in self.network.weights + self.network.biases]
+
+    def on_epoch_end(self, stats: Dict[str, float]) -> None:
+        if self.monitor not in stats:
+            return
+        value = stats[self.monitor]
+        if value < self.best - self.min_delta:
+            self.best = value
+            self.best_epoch = stats['epoch']
+            self._wait = 0
+            for buffer, param in zip(self._best_params, self.network.weights + self.network.biases):
+                np.copyto(buffer, param)
+            return
+        self._wait += 1
+        if self._wait >= self.patience:
+            self.stop_training = True
+            self.stopped_epoch = stats['epoch']
+
+    def on_train_end(self) -> None:
+        if self.restore_best_weights and self.best_epoch >= 0:
+            for buffer, param in zip(self._best_params, self.network.weights + self.network.biases):
+                np.copyto(param, buffer)
+
+
+class Workspace:
+    """Preallocated per-layer buffers for batches of up to n_samples rows.
+    
+    Attributes:
+        n_samples: Number of rows the per-sample buffers hold.
+        z: Pre-activation buffers, one per layer, shape (n_samples, layers[i + 1]).
+        a: Post-activation buffers, one per layer, shape (n_samples, layers[i + 1]).
+        dz: Error signal buffers matching z.
+        mask: Boolean ReLU masks for the hidden layers.
+        row_buffer: Scratch column of shape (n_samples, 1) for softmax reductions.
+        dw: Weight gradient buffers matching the weight matrices.
+        db: Bias gradient buffers matching the bias vectors.
+    """
+
+    def __init__(self, layers: List[int], n_samples: int,
+                 dtype: DTypeLike = np.float32) -> None:
+        """Allocate every buffer needed for a batch of n_samples rows.
+        
+        Args:
+            layers: Network architecture, as passed to NeuralNetwork.
+            n_samples: Number of rows in the batches this workspace serves.
+            dtype: Floating point type of the network parameters.
+        """
+        sizes = layers[1:]
+        self.n_samples = n_samples
+        self.z = [np.empty((n_samples, size), dtype=dtype) for size in sizes]
+        self.a = [np.empty((n_samples, size), dtype=dtype) for size in sizes]
+        self.dz = [np.empty((n_samples, size), dtype=dtype) for size in sizes]
+        self.mask = [np.empty((n_samples, size), dtype=bool) for size in sizes[:-1]]
+        self.row_buffer = np.empty((n_samples, 1), dtype=dtype)
+        self.dw = [np.empty((layers[i], layers[i + 1]), dtype=dtype) for i in range(len(sizes))]
+        self.db = [np.empty((1, size), dtype=dtype) for size in sizes]
+
+    def rows(self, n_samples: int) -> 'Workspace':
+        """Return a workspace whose per-sample buffers are the first n_samples rows of this one.
+        
+        The leading rows of a C-contiguous buffer are themselves contiguous,
+        so the views can be passed as out= targets. Gradient buffers are shared.
+        
+        Args:
+            n_samples: Number of rows, at most self.n_samples.
+            
+        Returns:
+            A Workspace of views into this one's buffers.
+        """
+        if n_samples > self.n_samples:
+            raise ValueError(f"workspace holds {self.n_samples} rows, asked for {n_samples}")
+        view = Workspace.__new__(Workspace)
+        view.n_samples = n_samples
+        view.z = [buffer[:n_samples] for buffer in self.z]
+        view.a = [buffer[:n_samples] for buffer in self.a]
+        view.dz = [buffer[:n_samples] for buffer in self.dz]
+        view.mask = [buffer[:n_samples] for buffer in self.mask]
+        view.row_buffer = self.row_buffer[:n_samples]
+        view.dw = self.dw
+        view.db = self.db
+        return view
+
+
+class Predictor:
+    """Inference-only forward pass over a fixed set of parameters.
+    
+    Unlike NeuralNetwork.forward, nothing is stored on the instance between
+    calls, so one predictor can serve many threads at once.
+    
+    Attributes:
+        weights: Weight matrices, read-only when the predictor owns a copy.
+        biases: Bias vectors, read-only when the predictor owns a copy.
+        dtype: Floating point type inputs are converted to.
+        chunk_size: Maximum number of rows pushed through the network at once.
+    """
+
+    def __init__(self, weights: List[np.ndarray], biases: List[np.ndarray],
+                 dtype: DTypeLike = np.float32, copy: bool = True,
+                 chunk_size: int = 8192) -> None:
+        """Wrap a set of trained parameters.
+        
+        Args:
+            weights: Weight matrices, one per layer.
+            biases: Bias vectors, one per layer.
+            dtype: Floating point type used for the computation.
+            copy: Take private, read-only copies of the parameters.
+            chunk_size: Rows processed per step, bounding temporary memory.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.dtype = np.dtype(dtype)
+        if copy:
+            weights = [w.astype(self.dtype, copy=True) for w in weights]
+            biases = [b.astype(self.dtype, copy=True) for b in biases]
+            for param in weights + biases:
+                param.setflags(write=False)
+        self.weights = list(weights)
+        self.biases = list(biases)
+        self.chunk_size = chunk_size
+
+    def _logits(self, X: np.ndarray) -> np.ndarray:
+        """Output layer pre-activations for one chunk of rows."""
+        a = np.asarray(X, dtype=self.dtype)
+        for i in range(len(self.weights) - 1):
+            a = np.dot(a, self.weights[i])
+            a += self.biases[i]
+            np.maximum(a, 0, out=a)
+        z = np.dot(a, self.weights[-1])
+        z += self.biases[-1]
+        return z
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict class indices.
+        
+        Softmax is monotonic, so the argmax is taken over the logits directly.
+        
+        Args:
+            X: Input data of shape (n_samples, n_features).
+            
+        Returns:
+            Predicted class indices of shape (n_samples,).
+        """
+        X = np.asarray(X)
+        n_samples = X.shape[0]
+        out = np.empty(n_samples, dtype=np.intp)
+        for start in range(0, n_samples, self.chunk_size):
+            end = start + self.chunk_size
+            np.argmax(self._logits(X[start:end]), axis=1, out=out[start:end])
+        return out
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Compute class probabilities.
+        
+        Args:
+            X: Input data of shape (n_samples, n_features).
+            
+        Returns:
+            Softmax probabilities of shape (n_samples, n_classes).
+        """
+        X = np.asarray(X)
+        n_samples = X.shape[0]
+        out = np.empty((n_samples, self.weights[-1].shape[1]), dtype=self.dtype)
+        for start in range(0, n_samples, self.chunk_size):
+            end = start + self.chunk_size
+            z = self._logits(X[start:end])
+            z -= z.max(axis=1, keepdims=True)
+            np.exp(z, out=z)
+            z /= z.sum(axis=1, keepdims=True)
+            out[start:end] = z
+        return out
 
 
 class NeuralNetwork:
@@ -11,36 +496,70 @@ class NeuralNetwork:
     
     Attributes:
         layers: List of integers representing the number of neurons in each layer.
-        learning_rate: Learning rate for weight updates during training.
+        learning_rate: Step size of the optimizer. Reads and writes
+                      optimizer.learning_rate, so changes apply from the next step.
         weights: List of weight matrices for each layer.
         biases: List of bias vectors for each layer.
         z_values: List to store pre-activation values during forward pass.
         a_values: List to store post-activation values during forward pass.
+        use_workspace: Reuse preallocated buffers in forward/backward instead of
+                       allocating fresh arrays on every call.
+        dtype: Floating point type of parameters, activations and gradients.
+        optimizer: Update rule applied by apply_gradients.
     """
 
-    def __init__(self, layers: List[int], learning_rate: float = 0.01) -> None:
+    def __init__(self, layers: List[int], learning_rate: float = 0.01,
+                 use_workspace: bool = False, dtype: DTypeLike = np.float32,
+                 initialize: bool = True, optimizer: Optional[Optimizer] = None) -> None:
         """Initialize the neural network with given architecture.
         
         Args:
             layers: List containing the number of neurons in each layer.
                    Example: [input_dim, hidden1, hidden2, output_dim]
-            learning_rate: Step size for updating weights during training.
+            learning_rate: Step size of the default SGD optimizer. Ignored
+                          when optimizer is given; set its rate instead.
+            use_workspace: Reuse one set of per-layer buffers, sized for the
+                          largest batch seen; smaller batches use views of
+                          its leading rows. The array returned by forward is
+                          then overwritten by the next call, so copy it if needed.
+            dtype: Floating point type used throughout training. float32
+                  halves memory traffic in the matrix multiplies; use float64
+                  for gradient checks. Inputs of another type are converted
+                  on entry to forward/backward.
+            initialize: Draw random starting weights. Pass False when the
+                       parameters will be assigned afterwards, e.g. by load.
+            optimizer: Update rule. Defaults to plain SGD at learning_rate.
         """
         self.layers = layers
-        self.learning_rate = learning_rate
         self.weights: List[np.ndarray] = []
         self.biases: List[np.ndarray] = []
         self.z_values: List[np.ndarray] = []
         self.a_values: List[np.ndarray] = []
-        self.initialize_weights()
+        self.use_workspace = use_workspace
+        self.dtype = np.dtype(dtype)
+        # One workspace sized for the largest batch seen; smaller batches use row views of it
+        self._workspace: Optional[Workspace] = None
+        self._workspace_view: Optional[Workspace] = None
+        self.optimizer = optimizer or SGD(learning_rate)
+        if initialize:
+            self.initialize_weights()
+
+    @property
+    def learning_rate(self) -> float:
+        """Step size of the optimizer."""
+        return self.optimizer.learning_rate
+
+    @learning_rate.setter
+    def learning_rate(self, value: float) -> None:
+        self.optimizer.learning_rate = value
 
     def initialize_weights(self) -> None:
         """Initialize weights and biases using random values from a normal distribution."""
         for i in range(len(self.layers) - 1):
             # He initialization for ReLU
             std_dev = np.sqrt(2.0 / self.layers[i])
-            weight = np.random.randn(self.layers[i], self.layers[i + 1]) * std_dev
-            bias = np.zeros((1, self.layers[i + 1]))
+            weight = (np.random.randn(self.layers[i], self.layers[i + 1]) * std_dev).astype(self.dtype)
+            bias = np.zeros((1, self.layers[i + 1]), dtype=self.dtype)
             self.weights.append(weight)
             self.biases.append(bias)
 
@@ -64,9 +583,9 @@ class NeuralNetwork:
             z: Input array.
             
         Returns:
-            Element-wise derivative: 1 if z > 0, else 0
+            Element-wise derivative: 1 if z > 0, else 0, in the dtype of z
         """
-        return np.where(z > 0, 1, 0)
+        return (z > 0).astype(z.dtype)
 
     @staticmethod
     def softmax(z: np.ndarray) -> np.ndarray:
@@ -82,6 +601,28 @@ class NeuralNetwork:
         exp_z = np.exp(z - np.max(z, axis=1, keepdims=True))
         return exp_z / exp_z.sum(axis=1, keepdims=True)
 
+    def get_workspace(self, n_samples: int) -> Workspace:
+        """Return the buffers for a batch size.
+        
+        Only one set of buffers is kept, sized for the largest batch seen so
+        far, so memory stays bounded however many distinct batch sizes a
+        stream produces. Smaller batches get views of its leading rows.
+        
+        Args:
+            n_samples: Number of rows in the batch.
+            
+        Returns:
+            A Workspace with exactly n_samples rows.
+        """
+        view = self._workspace_view
+        if view is not None and view.n_samples == n_samples:
+            return view
+        if self._workspace is None or self._workspace.n_samples < n_samples:
+            self._workspace = Workspace(self.layers, n_samples, self.dtype)
+        view = self._workspace.rows(n_samples)
+        self._workspace_view = view
+        return view
+
     def forward(self, X: np.ndarray) -> np.ndarray:
         """Perform forward propagation through the network.
         
@@ -91,6 +632,10 @@ class NeuralNetwork:
         Returns:
             Output of the network after forward pass.
         """
+        X = np.asarray(X, dtype=self.dtype)
+        if self.use_workspace:
+            return self._forward_workspace(X)
+
         self.z_values = []  # Reset z values
         self.a_values = [X]  # Input layer activations
         
@@ -109,6 +654,28 @@ class NeuralNetwork:
         
         return a_output
 
+    def _forward_workspace(self, X: np.ndarray) -> np.ndarray:
+        """Forward pass writing every intermediate into the cached workspace."""
+        ws = self.get_workspace(X.shape[0])
+        self.z_values = ws.z
+        self.a_values = [X] + ws.a
+        
+        for i in range(len(self.weights)):
+            z = ws.z[i]
+            np.dot(self.a_values[i], self.weights[i], out=z)
+            z += self.biases[i]
+            if i < len(self.weights) - 1:
+                np.maximum(z, 0, out=ws.a[i])
+        
+        # Numerically stable softmax, in place in the output buffer
+        a_output = ws.a[-1]
+        np.max(z, axis=1, keepdims=True, out=ws.row_buffer)
+        np.subtract(z, ws.row_buffer, out=a_output)
+        np.exp(a_output, out=a_output)
+        np.sum(a_output, axis=1, keepdims=True, out=ws.row_buffer)
+        a_output /= ws.row_buffer
+        return a_output
+
     def backward(self, X: np.ndarray, y: np.ndarray) -> None:
         """Perform backpropagation and update weights and biases.
         
@@ -116,30 +683,90 @@ class NeuralNetwork:
             X: Input data of shape (n_samples, n_features).
             y: One-hot encoded true labels of shape (n_samples, n_classes).
         """
+        weight_grads, bias_grads = self.compute_gradients(X, y)
+        self.apply_gradients(weight_grads, bias_grads)
+
+    def compute_gradients(self, X: np.ndarray, y: np.ndarray) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Backpropagate the error of the last forward pass without updating anything.
+        
+        Args:
+            X: Input data of shape (n_samples, n_features), as passed to forward.
+            y: One-hot encoded true labels of shape (n_samples, n_classes).
+            
+        Returns:
+            Tuple of (weight_grads, bias_grads), the mean gradients over the
+            batch. In workspace mode these are the workspace buffers.
+        """
+        y = np.asarray(y, dtype=self.dtype)
+        if self.use_workspace:
+            return self._gradients_workspace(X, y)
+
         m = X.shape[0]  # Number of samples
+        weight_grads: List[np.ndarray] = [None] * len(self.weights)
+        bias_grads: List[np.ndarray] = [None] * len(self.biases)
         
         # Output layer gradient
         dz_output = self.a_values[-1] - y
-        dw_output = np.dot(self.a_values[-2].T, dz_output) / m
-        db_output = np.sum(dz_output, axis=0, keepdims=True) / m
-        
-        # Update output layer parameters
-        self.weights[-1] -= self.learning_rate * dw_output
-        self.biases[-1] -= self.learning_rate * db_output
+        weight_grads[-1] = np.dot(self.a_values[-2].T, dz_output) / m
+        bias_grads[-1] = np.sum(dz_output, axis=0, keepdims=True) / m
         
         # Backpropagate through hidden layers
         da = dz_output
         for i in reversed(range(len(self.weights) - 1)):
             dz = da.dot(self.weights[i + 1].T) * self.activation_derivative(self.z_values[i])
-            dw = np.dot(self.a_values[i].T, dz) / m
-            db = np.sum(dz, axis=0, keepdims=True) / m
-            
-            # Update parameters
-            self.weights[i] -= self.learning_rate * dw
-            self.biases[i] -= self.learning_rate * db
+            weight_grads[i] = np.dot(self.a_values[i].T, dz) / m
+            bias_grads[i] = np.sum(dz, axis=0, keepdims=True) / m
             
             # Prepare for next layer
             da = dz
+        return weight_grads, bias_grads
+
+    def _gradients_workspace(self, X: np.ndarray, y: np.ndarray) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Backward pass using the workspace filled by the matching forward call."""
+        ws = self.get_workspace(X.shape[0])
+        scale = 1.0 / X.shape[0]
+        
+        da = ws.dz[-1]
+        np.subtract(self.a_values[-1], y, out=da)
+        for i in reversed(range(len(self.weights))):
+            if i < len(self.weights) - 1:
+                dz = ws.dz[i]
+                np.dot(da, self.weights[i + 1].T, out=dz)
+                np.greater(self.z_values[i], 0, out=ws.mask[i])
+                np.multiply(dz, ws.mask[i], out=dz)
+                da = dz
+            np.dot(self.a_values[i].T, da, out=ws.dw[i])
+            np.sum(da, axis=0, keepdims=True, out=ws.db[i])
+            ws.dw[i] *= scale
+            ws.db[i] *= scale
+        return ws.dw, ws.db
+
+    def apply_gradients(self, weight_grads: List[np.ndarray], bias_grads: List[np.ndarray]) -> None:
+        """Update the parameters in place with the network's optimizer.
+        
+        Args:
+            weight_grads: Gradients matching self.weights. May be overwritten.
+            bias_grads: Gradients matching self.biases. May be overwritten.
+        """
+        self.optimizer.step(self.weights + self.biases, weight_grads + bias_grads)
+
+    @staticmethod
+    def cross_entropy_sum(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+        """Summed cross-entropy for one-hot labels.
+        
+        Only the predicted probability of the true class is logged, so this
+        touches n_samples values instead of the full (n_samples, n_classes)
+        matrix that compute_loss works on.
+        
+        Args:
+            y_true: One-hot encoded true labels.
+            y_pred: Predicted probabilities.
+            
+        Returns:
+            Cross-entropy summed over the samples.
+        """
+        p_true = np.einsum('ij,ij->i', y_true, y_pred)
+        return -float(np.log(p_true + 1e-8).sum())
 
     @staticmethod
     def compute_loss(y_true: np.ndarray, y_pred: np.ndarray) -> float:
@@ -157,23 +784,138 @@ class NeuralNetwork:
         loss = -np.sum(y_true * np.log(y_pred + 1e-8)) / m
         return loss
 
-    def train(self, X: np.ndarray, y: np.ndarray, epochs: int = 1000) -> None:
+    def train(self, X: np.ndarray, y: np.ndarray, epochs: int = 1000,
+              batch_size: Optional[int] = None, shuffle: bool = True,
+              callbacks: Optional[List[TrainingCallback]] = None,
+              validation_data: Optional[Batch] = None,
+              validation_every: int = 1) -> None:
         """Train the neural network.
         
         Args:
             X: Training data of shape (n_samples, n_features).
             y: One-hot encoded training labels of shape (n_samples, n_classes).
             epochs: Number of training iterations over the entire dataset.
+            batch_size: Number of samples per gradient step. None trains on the
+                       full dataset at once, so memory grows with n_samples.
+            shuffle: Visit mini-batches in a new random order every epoch.
+            callbacks: Hooks receiving per-epoch statistics. None prints the
+                      loss every 100 epochs.
+            validation_data: Optional (X_val, y_val) evaluated with evaluate
+                            and reported as val_loss, e.g. for EarlyStopping.
+            validation_every: Evaluate on every n-th epoch.
         """
-        for epoch in range(epochs):
-            # Forward and backward pass
-            y_pred = self.forward(X)
-            self.backward(X, y)
+        if batch_size is None:
+            X = np.asarray(X, dtype=self.dtype)
+            y = np.asarray(y, dtype=self.dtype)
+            make_batches = lambda: [(X, y)]
+        else:
+            make_batches = lambda: iterate_minibatches(X, y, batch_size, shuffle)
+        run_epochs(self._epoch_runner(make_batches, validation_data, validation_every),
+                   epochs, callbacks)
+
+    def _epoch_runner(self, make_batches: Callable[[], Iterable[Batch]],
+                      validation_data: Optional[Batch],
+                      validation_every: int) -> Callable[[int], Dict[str, float]]:
+        """Build the run_epoch function for run_epochs, with optional validation."""
+        def run_epoch(epoch: int) -> Dict[str, float]:
+            stats = self.train_epoch_stats(make_batches())
+            if validation_data is not None and (epoch + 1) % validation_every == 0:
+                stats['val_loss'] = self.evaluate(*validation_data)
+            return stats
+        return run_epoch
+
+    def evaluate(self, X: np.ndarray, y: np.ndarray, chunk_size: int = 8192) -> float:
+        """Mean cross-entropy on held-out data, without touching training state.
+        
+        Args:
+            X: Input data of shape (n_samples, n_features).
+            y: One-hot encoded labels of shape (n_samples, n_classes).
+            chunk_size: Rows evaluated at once, bounding temporary memory.
+            
+        Returns:
+            Mean cross-entropy loss.
+        """
+        X = np.asarray(X)
+        y = np.asarray(y)
+        predictor = self.freeze(copy=False, chunk_size=chunk_size)
+        total_loss = 0.0
+        for start in range(0, X.shape[0], chunk_size):
+            y_chunk = np.asarray(y[start:start + chunk_size], dtype=self.dtype)
+            total_loss += self.cross_entropy_sum(y_chunk, predictor.predict_proba(X[start:start + chunk_size]))
+        return total_loss / max(X.shape[0], 1)
+
+    def train_epoch(self, batches: Iterable[Batch]) -> float:
+        """Run one forward/backward step per mini-batch.
+        
+        Args:
+            batches: Iterable of (X_batch, y_batch) pairs.
+            
+        Returns:
+            Sample-weighted mean loss over the epoch, taken from the forward
+            outputs that were already computed for each step.
+        """
+        return self.train_epoch_stats(batches)['loss']
+
+    def train_epoch_stats(self, batches: Iterable[Batch]) -> Dict[str, float]:
+        """Run one epoch like train_epoch, timing each phase.
+        
+        Args:
+            batches: Iterable of (X_batch, y_batch) pairs.
             
-            # Print training progress
-            if epoch % 100 == 0:
-                loss = self.compute_loss(y, y_pred)
-                print(f'Epoch {epoch:4d}, Loss: {loss:.6f}')
+        Returns:
+            Dict with the mean loss, the number of samples and the seconds
+            spent in forward, backward (gradients) and update.
+        """
+        total_loss = 0.0
+        n_seen = 0
+        forward_seconds = backward_seconds = update_seconds = 0.0
+        for X_batch, y_batch in batches:
+            X_batch = np.asarray(X_batch, dtype=self.dtype)
+            y_batch = np.asarray(y_batch, dtype=self.dtype)
+            t0 = time.perf_counter()
+            y_pred = self.forward(X_batch)
+            total_loss += self.cross_entropy_sum(y_batch, y_pred)
+            t1 = time.perf_counter()
+            weight_grads, bias_grads = self.compute_gradients(X_batch, y_batch)
+            t2 = time.perf_counter()
+            self.apply_gradients(weight_grads, bias_grads)
+            t3 = time.perf_counter()
+            forward_seconds += t1 - t0
+            backward_seconds += t2 - t1
+            update_seconds += t3 - t2
+            n_seen += X_batch.shape[0]
+        return {
+            'loss': total_loss / max(n_seen, 1),
+            'samples': n_seen,
+            'forward_seconds': forward_seconds,
+            'backward_seconds': backward_seconds,
+            'update_seconds': update_seconds,
+        }
+
+    def train_stream(self, source: BatchSource, epochs: int = 1,
+                     callbacks: Optional[List[TrainingCallback]] = None,
+                     validation_data: Optional[Batch] = None,
+                     validation_every: int = 1) -> None:
+        """Train from a stream of mini-batches that never has to fit in memory.
+        
+        Args:
+            source: Either an iterable of (X_batch, y_batch) pairs, which is
+                   consumed once, or a zero-argument callable returning a
+                   fresh iterable (e.g. a generator function reading from disk)
+                   that is called once per epoch.
+            epochs: Number of passes over the stream. Must be 1 when source is
+                   a plain iterable.
+            callbacks: Hooks receiving per-epoch statistics. None prints the
+                      loss every 100 epochs.
+            validation_data: Optional (X_val, y_val) evaluated with evaluate
+                            and reported as val_loss, e.g. for EarlyStopping.
+            validation_every: Evaluate on every n-th epoch.
+        """
+        if not callable(source) and epochs != 1:
+            raise ValueError("Pass a callable source to stream more than one epoch")
+        make_batches = source if callable(source) else lambda: source
+        run_epochs(self._epoch_runner(make_batches, validation_data, validation_every),
+                   epochs, callbacks)
 
     def predict(self, X: np.ndarray) -> np.ndarray:
         """Make class predictions for input data.
@@ -184,24 +926,372 @@ class NeuralNetwork:
         Returns:
             Predicted class indices of shape (n_samples,).
         """
-        y_pred = self.forward(X)
-        return np.argmax(y_pred, axis=1)
+        return self.freeze(copy=False).predict(X)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Compute class probabilities without recording training state.
+        
+        Args:
+            X: Input data of shape (n_samples, n_features).
+            
+        Returns:
+            Softmax probabilities of shape (n_samples, n_classes).
+        """
+        return self.freeze(copy=False).predict_proba(X)
+
+    def freeze(self, copy: bool = True, chunk_size: int = 8192) -> 'Predictor':
+        """Create an inference-only view of the network.
+        
+        Args:
+            copy: Snapshot the parameters so further training does not affect
+                 the predictor. When False the predictor reads the live arrays.
+            chunk_size: Rows processed per step, bounding temporary memory.
+            
+        Returns:
+            A Predictor sharing no mutable state with forward/backward.
+        """
+        return Predictor(self.weights, self.biases, dtype=self.dtype,
+                         copy=copy, chunk_size=chunk_size)
+
+    def save(self, path: str) -> None:
+        """Write the network to a checkpoint file.
+        
+        The header stores the optimizer's current learning rate. Optimizer
+        type and state are not saved, so load restores a plain SGD at that rate.
+        
+        The checkpoint is written to a temporary file beside path and then
+        renamed over it, so networks loaded from the old file with a memory
+        map keep reading the old contents, even when saving to the
+        checkpoint this network was loaded from.
+        
+        Args:
+            path: Destination file path.
+        """
+        header = json.dumps({
+            'layers': list(self.layers),
+            'dtype': self.dtype.str,
+            'learning_rate': self.learning_rate,
+        }).encode('utf-8')
+        prefix_len = len(CHECKPOINT_MAGIC) + 8 + len(header)
+        padding = -prefix_len % CHECKPOINT_ALIGNMENT
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(CHECKPOINT_MAGIC)
+                f.write(struct.pack('<Q', len(header)))
+                f.write(header)
+                f.write(b'\0' * padding)
+                for param in self.weights + self.biases:
+                    f.write(np.ascontiguousarray(param, dtype=self.dtype).tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'NeuralNetwork':
+        """Load a network written by save.
+        
+        With a memory-mapped mode the parameters are views into the file, so
+        every process loading the same checkpoint shares one copy in the page
+        cache and nothing is read until it is used. Pair with
+        freeze(copy=False) for serving.
+        
+        Args:
+            path: Checkpoint file path.
+            mmap_mode: np.memmap mode: 'r' for read-only sharing, 'c' for
+                      copy-on-write (trainable, changes stay private), 'r+'
+                      to train and write back to the file. None reads the
+                      parameters into ordinary arrays.
+            
+        Returns:
+            The loaded NeuralNetwork.
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                raise ValueError(f"{path} is not a NeuralNetwork checkpoint")
+            (header_len,) = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_len).decode('utf-8'))
+        prefix_len = len(CHECKPOINT_MAGIC) + 8 + header_len
+        offset = prefix_len + (-prefix_len % CHECKPOINT_ALIGNMENT)
+        
+        layers = header['layers']
+        dtype = np.dtype(header['dtype'])
+        shape = (parameter_count(layers),)
+        if mmap_mode is None:
+            buffer = np.fromfile(path, dtype=dtype, count=shape[0], offset=offset)
+        else:
+            buffer = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=offset, shape=shape)
+        
+        nn = cls(layers, header['learning_rate'], dtype=dtype, initialize=False)
+        nn.weights, nn.biases = parameter_views(buffer, layers)
+        return nn
+
+
+def iterate_minibatches(X: np.ndarray, y: np.ndarray, batch_size: int,
+                        shuffle: bool = True) -> Iterator[Batch]:
+    """Yield (X_batch, y_batch) slices of a dataset.
+    
+    Shuffling permutes an index array rather than X itself, so only one batch
+    worth of rows is ever copied at a time.
+    
+    Args:
+        X: Input data of shape (n_samples, n_features).
+        y: One-hot encoded labels of shape (n_samples, n_classes).
+        batch_size: Maximum number of samples per batch.
+        shuffle: Draw batches in a random order.
+        
+    Yields:
+        Tuples of (X_batch, y_batch).
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    X = np.asarray(X)
+    y = np.asarray(y)
+    n_samples = X.shape[0]
+    if not shuffle:
+        for start in range(0, n_samples, batch_size):
+            yield X[start:start + batch_size], y[start:start + batch_size]
+        return
+    indices = np.random.permutation(n_samples)
+    for start in range(0, n_samples, batch_size):
+        batch_idx = indices[start:start + batch_size]
+        yield X[batch_idx], y[batch_idx]
+
+
+def parameter_count(layers: List[int]) -> int:
+    """Number of weights and biases in a network with the given architecture."""
+    return sum(layers[i] * layers[i + 1] + layers[i + 1] for i in range(len(layers) - 1))
+
+
+def parameter_views(buffer: np.ndarray, layers: List[int]) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """Split a flat parameter buffer into weight and bias views.
+    
+    The layout is every weight matrix in layer order followed by every bias
+    vector, all C-contiguous, so the views share memory with the buffer.
+    
+    Args:
+        buffer: One-dimensional array of length parameter_count(layers).
+        layers: Network architecture.
+        
+    Returns:
+        Tuple of (weights, biases) views into buffer.
+    """
+    weights = []
+    biases = []
+    offset = 0
+    for i in range(len(layers) - 1):
+        size = layers[i] * layers[i + 1]
+        weights.append(buffer[offset:offset + size].reshape(layers[i], layers[i + 1]))
+        offset += size
+    for i in range(len(layers) - 1):
+        biases.append(buffer[offset:offset + layers[i + 1]].reshape(1, layers[i + 1]))
+        offset += layers[i + 1]
+    return weights, biases
+
+
+# Per-process state for ParallelTrainer workers, filled by _init_worker
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(layers: List[int], dtype: str, max_batch: int, n_workers: int,
+                 params_name: str, grads_name: str, X_name: str, y_name: str) -> None:
+    """Attach a pool worker to the trainer's shared memory blocks."""
+    dtype = np.dtype(dtype)
+    blocks = [shared_memory.SharedMemory(name=name)
+              for name in (params_name, grads_name, X_name, y_name)]
+    n_params = parameter_count(layers)
+    params = np.ndarray((n_params,), dtype=dtype, buffer=blocks[0].buf)
+    nn = NeuralNetwork(layers, use_workspace=True, dtype=dtype)
+    nn.weights, nn.biases = parameter_views(params, layers)
+    _worker_state.update(
+        blocks=blocks,
+        network=nn,
+        grads=np.ndarray((n_workers, n_params), dtype=dtype, buffer=blocks[1].buf),
+        X=np.ndarray((max_batch, layers[0]), dtype=dtype, buffer=blocks[2].buf),
+        y=np.ndarray((max_batch, layers[-1]), dtype=dtype, buffer=blocks[3].buf),
+    )
+
+
+def _shard_gradients(task: Tuple[int, int, int]) -> float:
+    """Write the summed gradients of one shard into the worker's grads row.
+    
+    Args:
+        task: Tuple of (worker row, first sample, end sample) in the shared batch.
+        
+    Returns:
+        Summed cross-entropy loss over the shard.
+    """
+    row, start, end = task
+    nn = _worker_state['network']
+    X = _worker_state['X'][start:end]
+    y = _worker_state['y'][start:end]
+    y_pred = nn.forward(X)
+    loss = NeuralNetwork.cross_entropy_sum(y, y_pred)
+    weight_grads, bias_grads = nn.compute_gradients(X, y)
+    out_weights, out_biases = parameter_views(_worker_state['grads'][row], nn.layers)
+    for out, grad in zip(out_weights + out_biases, weight_grads + bias_grads):
+        np.multiply(grad, end - start, out=out)
+    return float(loss)
+
+
+class ParallelTrainer:
+    """Data-parallel mini-batch training over a process pool.
+    
+    Parameters, the current batch and one gradient row per worker live in
+    shared memory. Each batch is split into one shard per worker, the workers
+    write their gradients in place, and the parent reduces them and applies a
+    single update, which the workers see directly on the next step.
+    
+    Use as a context manager, or call close() to copy the trained parameters
+    back into the network and release the pool and shared memory.
+    
+    Attributes:
+        network: The network being trained.
+        n_workers: Number of worker processes.
+        max_batch: Largest batch size the shared input buffers can hold.
+    """
+
+    def __init__(self, network: NeuralNetwork, n_workers: Optional[int] = None,
+                 max_batch: int = 4096) -> None:
+        """Move the network's parameters into shared memory and start the pool.
+        
+        Args:
+            network: Network to train. Its weights and biases are replaced by
+                    views into shared memory until close() is called.
+            n_workers: Number of processes. Defaults to the CPU count.
+            max_batch: Largest batch size that will be passed to train.
+        """
+        self.network = network
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        self.max_batch = max_batch
+        layers = network.layers
+        dtype = network.dtype
+        n_params = parameter_count(layers)
+        
+        sizes = [n_params, self.n_workers * n_params,
+                 max_batch * layers[0], max_batch * layers[-1]]
+        self._blocks = [shared_memory.SharedMemory(create=True, size=max(size, 1) * dtype.itemsize)
+                        for size in sizes]
+        self._params = np.ndarray((n_params,), dtype=dtype, buffer=self._blocks[0].buf)
+        self._grads = np.ndarray((self.n_workers, n_params), dtype=dtype, buffer=self._blocks[1].buf)
+        self._X = np.ndarray((max_batch, layers[0]), dtype=dtype, buffer=self._blocks[2].buf)
+        self._y = np.ndarray((max_batch, layers[-1]), dtype=dtype, buffer=self._blocks[3].buf)
+        self._reduced = np.empty(n_params, dtype=dtype)
+        self._gradient_seconds = 0.0
+        self._update_seconds = 0.0
+        
+        weights, biases = parameter_views(self._params, layers)
+        for view, param in zip(weights + biases, network.weights + network.biases):
+            view[...] = param
+        network.weights, network.biases = weights, biases
+        
+        self._pool = multiprocessing.Pool(
+            self.n_workers, initializer=_init_worker,
+            initargs=(layers, dtype.str, max_batch, self.n_workers,
+                      *(block.name for block in self._blocks)))
+
+    def __enter__(self) -> 'ParallelTrainer':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def step(self, X_batch: np.ndarray, y_batch: np.ndarray) -> float:
+        """Run one data-parallel gradient step.
+        
+        Args:
+            X_batch: Input rows, at most max_batch of them.
+            y_batch: One-hot encoded labels for those rows.
+            
+        Returns:
+            Mean loss over the batch, from the forward pass the workers ran.
+        """
+        n = X_batch.shape[0]
+        if n > self.max_batch:
+            raise ValueError(f"Batch of {n} rows exceeds max_batch={self.max_batch}")
+        self._X[:n] = X_batch
+        self._y[:n] = y_batch
+        
+        bounds = np.linspace(0, n, self.n_workers + 1).astype(int)
+        tasks = [(row, bounds[row], bounds[row + 1])
+                 for row in range(self.n_workers) if bounds[row + 1] > bounds[row]]
+        t0 = time.perf_counter()
+        losses = self._pool.map(_shard_gradients, tasks)
+        
+        # Reduce the per-worker gradient sums into a batch mean
+        rows = [task[0] for task in tasks]
+        np.sum(self._grads[rows], axis=0, out=self._reduced)
+        self._reduced /= n
+        t1 = time.perf_counter()
+        weight_grads, bias_grads = parameter_views(self._reduced, self.network.layers)
+        self.network.apply_gradients(weight_grads, bias_grads)
+        self._gradient_seconds += t1 - t0
+        self._update_seconds += time.perf_counter() - t1
+        return sum(losses) / n
+
+    def train(self, X: np.ndarray, y: np.ndarray, epochs: int = 1000,
+              batch_size: Optional[int] = None, shuffle: bool = True,
+              callbacks: Optional[List[TrainingCallback]] = None) -> None:
+        """Train with the same schedule as NeuralNetwork.train.
+        
+        Args:
+            X: Training data of shape (n_samples, n_features).
+            y: One-hot encoded training labels of shape (n_samples, n_classes).
+            epochs: Number of passes over the dataset.
+            batch_size: Samples per step. Defaults to max_batch.
+            shuffle: Visit mini-batches in a new random order every epoch.
+            callbacks: Hooks receiving per-epoch statistics. None prints the
+                      loss every 100 epochs.
+        """
+        batch_size = batch_size or self.max_batch
+        
+        def run_epoch(epoch: int) -> Dict[str, float]:
+            total_loss = 0.0
+            self._gradient_seconds = self._update_seconds = 0.0
+            for X_batch, y_batch in iterate_minibatches(X, y, batch_size, shuffle):
+                total_loss += self.step(X_batch, y_batch) * X_batch.shape[0]
+            return {
+                'loss': total_loss / X.shape[0],
+                'samples': X.shape[0],
+                'gradient_seconds': self._gradient_seconds,
+                'update_seconds': self._update_seconds,
+            }
+        
+        run_epochs(run_epoch, epochs, callbacks)
+
+    def close(self) -> None:
+        """Stop the workers and give the network private copies of its parameters."""
+        if self._pool is None:
+            return
+        self._pool.close()
+        self._pool.join()
+        self._pool = None
+        self.network.weights = [w.copy() for w in self.network.weights]
+        self.network.biases = [b.copy() for b in self.network.biases]
+        del self._params, self._grads, self._X, self._y
+        for block in self._blocks:
+            block.close()
+            block.unlink()
 
 
-def create_sample_data(n_samples: int = 100, n_features: int = 4, n_classes: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+def create_sample_data(n_samples: int = 100, n_features: int = 4, n_classes: int = 3,
+                       dtype: DTypeLike = np.float32) -> Tuple[np.ndarray, np.ndarray]:
     """Create sample training data.
     
     Args:
         n_samples: Number of samples to generate.
         n_features: Number of features per sample.
         n_classes: Number of output classes.
+        dtype: Floating point type of X and y.
         
     Returns:
         Tuple of (X, y) where X is the input data and y is one-hot encoded labels.
     """
     np.random.seed(42)
-    X = np.random.rand(n_samples, n_features)
-    y = np.zeros((n_samples, n_classes))
+    X = np.random.rand(n_samples, n_features).astype(dtype)
+    y = np.zeros((n_samples, n_classes), dtype=dtype)
     y[np.arange(n_samples), np.random.choice(n_classes, n_samples)] = 1
     return X, y
 
@@ -0,0 +1,272 @@
+"""
+Benchmarks for the NeuralNetwork in predictionModel.py.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from predictionModel import (NeuralNetwork, ParallelTrainer, create_sample_data,
+                             iterate_minibatches)
+
+# Default sweep: hidden widths, hidden depths, batch sizes and dtypes
+SWEEP_WIDTHS = [32, 128, 512]
+SWEEP_DEPTHS = [1, 2, 4]
+SWEEP_BATCH_SIZES = [32, 256, 2048]
+SWEEP_DTYPES = ['float32', 'float64']
+SWEEP_FEATURES = 64
+SWEEP_CLASSES = 10
+
+
+def _best_time(fn: Callable[[], Any], repeats: int, rounds: int = 3) -> float:
+    """Best mean seconds per call of fn over several timing rounds."""
+    fn()  # warm-up, also allocates any workspace buffers
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best
+
+
+def benchmark_throughput(layers: List[int], batch_size: int, dtype: str = 'float32',
+                         use_workspace: bool = True, repeats: int = 20) -> Dict[str, Any]:
+    """Measure forward, backward and predict throughput for one configuration.
+    
+    Backward covers compute_gradients plus apply_gradients on the activations
+    left by a single forward call, so it excludes the forward cost.
+    
+    Args:
+        layers: Network architecture.
+        batch_size: Rows per call.
+        dtype: Floating point type of the network and data.
+        use_workspace: Run forward/backward with preallocated buffers.
+        repeats: Calls per timing round.
+        
+    Returns:
+        Dict describing the configuration plus samples/sec for each phase.
+    """
+    X, y = create_sample_data(n_samples=batch_size, n_features=layers[0],
+                              n_classes=layers[-1], dtype=dtype)
+    nn = NeuralNetwork(layers, learning_rate=0.001, use_workspace=use_workspace, dtype=dtype)
+    predictor = nn.freeze()
+    
+    forward_seconds = _best_time(lambda: nn.forward(X), repeats)
+    nn.forward(X)
+    backward_seconds = _best_time(lambda: nn.apply_gradients(*nn.compute_gradients(X, y)), repeats)
+    predict_seconds = _best_time(lambda: predictor.predict(X), repeats)
+    return {
+        'layers': layers,
+        'batch_size': batch_size,
+        'dtype': dtype,
+        'use_workspace': use_workspace,
+        'forward_samples_per_sec': batch_size / forward_seconds,
+        'backward_samples_per_sec': batch_size / backward_seconds,
+        'predict_samples_per_sec': batch_size / predict_seconds,
+    }
+
+
+def run_sweep(widths: List[int] = SWEEP_WIDTHS, depths: List[int] = SWEEP_DEPTHS,
+              batch_sizes: List[int] = SWEEP_BATCH_SIZES, dtypes: List[str] = SWEEP_DTYPES,
+              repeats: int = 20) -> List[Dict[str, Any]]:
+    """Benchmark every combination of hidden width, depth, batch size and dtype.
+    
+    Args:
+        widths: Neurons per hidden layer.
+        depths: Number of hidden layers.
+        batch_sizes: Rows per call.
+        dtypes: Floating point types.
+        repeats: Calls per timing round.
+        
+    Returns:
+        One benchmark_throughput result per configuration.
+    """
+    results = []
+    for width, depth, batch_size, dtype in itertools.product(widths, depths, batch_sizes, dtypes):
+        layers = [SWEEP_FEATURES] + [width] * depth + [SWEEP_CLASSES]
+        result = benchmark_throughput(layers, batch_size, dtype, repeats=repeats)
+        print(f"  layers={str(layers):32} batch={batch_size:5d} {dtype:8} "
+              f"forward {result['forward_samples_per_sec']:12.0f}/s  "
+              f"backward {result['backward_samples_per_sec']:12.0f}/s  "
+              f"predict {result['predict_samples_per_sec']:12.0f}/s")
+        results.append(result)
+    return results
+
+
+def run_metadata() -> Dict[str, Any]:
+    """Describe the machine and library versions a run was taken on."""
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': multiprocessing.cpu_count(),
+    }
+
+
+def save_results(path: str, results: List[Dict[str, Any]]) -> None:
+    """Write results as JSON lines, each tagged with the run metadata.
+    
+    Args:
+        path: Output file, overwritten.
+        results: Rows from run_sweep.
+    """
+    metadata = run_metadata()
+    with open(path, 'w') as f:
+        for result in results:
+            f.write(json.dumps({**metadata, **result}) + '\n')
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    """Read a file written by save_results."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_results(baseline: List[Dict[str, Any]], current: List[Dict[str, Any]]) -> None:
+    """Print current/baseline throughput ratios for configurations in both runs.
+    
+    Args:
+        baseline: Rows from an earlier run.
+        current: Rows from this run.
+    """
+    def key(row: Dict[str, Any]) -> tuple:
+        return tuple(row['layers']), row['batch_size'], row['dtype'], row['use_workspace']
+    
+    previous = {key(row): row for row in baseline}
+    for row in current:
+        old = previous.get(key(row))
+        if old is None:
+            continue
+        ratios = [row[f'{phase}_samples_per_sec'] / old[f'{phase}_samples_per_sec']
+                  for phase in ('forward', 'backward', 'predict')]
+        print(f"  layers={str(row['layers']):32} batch={row['batch_size']:5d} {row['dtype']:8} "
+              f"forward {ratios[0]:5.2f}x  backward {ratios[1]:5.2f}x  predict {ratios[2]:5.2f}x")
+
+
+def benchmark_workspace(layers: List[int], n_samples: int = 100_000, batch_size: int = 256,
+                        epochs: int = 3) -> Dict[str, Dict[str, float]]:
+    """Compare allocating and workspace training on the same data.
+    
+    Memory is traced with tracemalloc, which sees NumPy's array allocations.
+    The peak is reset every epoch, so the figure reported is the extra memory
+    a single epoch needs on top of the model and dataset. tracemalloc cannot
+    count allocation events, only live blocks, so this peak stands in for
+    allocations per epoch: temporaries created and freed within a step show
+    up in it, while reused workspace buffers do not.
+    
+    Args:
+        layers: Network architecture to benchmark.
+        n_samples: Number of training rows.
+        batch_size: Rows per gradient step.
+        epochs: Timed epochs per mode, after one untimed warm-up epoch.
+        
+    Returns:
+        Mapping of mode name to its mean epoch time (seconds) and peak
+        transient bytes per epoch.
+    """
+    X, y = create_sample_data(n_samples=n_samples, n_features=layers[0], n_classes=layers[-1])
+    results = {}
+    for use_workspace in (False, True):
+        nn = NeuralNetwork(layers, learning_rate=0.01, use_workspace=use_workspace)
+        nn.train_epoch(iterate_minibatches(X, y, batch_size))  # warm-up
+        
+        times = []
+        peaks = []
+        tracemalloc.start()
+        for _ in range(epochs):
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            nn.train_epoch(iterate_minibatches(X, y, batch_size))
+            times.append(time.perf_counter() - start)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+        
+        mode = 'workspace' if use_workspace else 'allocating'
+        results[mode] = {
+            'epoch_seconds': sum(times) / len(times),
+            'peak_transient_bytes': max(peaks),
+        }
+    return results
+
+
+def benchmark_parallel(layers: List[int], max_workers: Optional[int] = None,
+                       n_samples: int = 200_000, batch_size: int = 4096,
+                       epochs: int = 2) -> Dict[int, float]:
+    """Measure ParallelTrainer throughput from 1 to max_workers processes.
+    
+    Args:
+        layers: Network architecture to benchmark.
+        max_workers: Largest pool size to try. Defaults to the CPU count.
+        n_samples: Number of training rows.
+        batch_size: Rows per gradient step, split across the workers.
+        epochs: Timed epochs per pool size, after one untimed warm-up step.
+        
+    Returns:
+        Mapping of worker count to training samples per second.
+    """
+    max_workers = max_workers or multiprocessing.cpu_count()
+    X, y = create_sample_data(n_samples=n_samples, n_features=layers[0], n_classes=layers[-1])
+    results = {}
+    for n_workers in range(1, max_workers + 1):
+        nn = NeuralNetwork(layers, learning_rate=0.01)
+        with ParallelTrainer(nn, n_workers=n_workers, max_batch=batch_size) as trainer:
+            trainer.step(X[:batch_size], y[:batch_size])  # warm-up
+            start = time.perf_counter()
+            for _ in range(epochs):
+                for X_batch, y_batch in iterate_minibatches(X, y, batch_size):
+                    trainer.step(X_batch, y_batch)
+            elapsed = time.perf_counter() - start
+        results[n_workers] = n_samples * epochs / elapsed
+    return results
+
+
+def main() -> None:
+    """Run the benchmarks selected on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('suite', nargs='?', default='sweep',
+                        choices=['sweep', 'workspace', 'parallel', 'all'])
+    parser.add_argument('--output', help="write sweep results to this JSON-lines file")
+    parser.add_argument('--compare', help="JSON-lines file from an earlier sweep to compare against")
+    parser.add_argument('--quick', action='store_true', help="small sweep for smoke testing")
+    args = parser.parse_args()
+    
+    if args.suite in ('sweep', 'all'):
+        print("Throughput sweep")
+        if args.quick:
+            results = run_sweep(widths=[32], depths=[1, 2], batch_sizes=[64], repeats=5)
+        else:
+            results = run_sweep()
+        if args.output:
+            save_results(args.output, results)
+        if args.compare:
+            print(f"\nCompared with {args.compare}")
+            compare_results(load_results(args.compare), results)
+    
+    layers = [64, 256, 256, 10]
+    if args.suite in ('workspace', 'all'):
+        print(f"\nWorkspace benchmark, layers={layers}")
+        for mode, stats in benchmark_workspace(layers).items():
+            print(f"  {mode:>10}: {stats['epoch_seconds'] * 1000:8.1f} ms/epoch, "
+                  f"{stats['peak_transient_bytes'] / 1024:10.1f} KiB peak transient per epoch")
+    
+    if args.suite in ('parallel', 'all'):
+        print(f"\nData-parallel scaling, layers={layers}")
+        scaling = benchmark_parallel(layers)
+        for n_workers, samples_per_sec in scaling.items():
+            print(f"  {n_workers:2d} workers: {samples_per_sec:12.0f} samples/s "
+                  f"({samples_per_sec / scaling[1]:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()